@@ -3,7 +3,13 @@ import OpenGL.GL as gl
 import imgui
 import pygame
 import sys
-from maze import Maze, search
+from maze import Maze, search, generators, renderer, reduction
+from maze.animation import SearchAnimation
+from maze.replanning import DStarLite
+from config.constants import COLORS
+
+# Seconds each frame may spend revealing the nodes visited by a search
+ANIMATION_FRAME_BUDGET = 0.008
 
 
 def screen_coordinates_to_grid_coordinates(
@@ -29,10 +35,20 @@ def main():
     io = imgui.get_io()
     io.display_size = window_size
     maze_size = 15
-    maze = Maze(maze_size)
+    supported_generators_selected_index = 0
+    supported_generators = list(generators.GENERATORS.keys())
+    maze = Maze(maze_size, supported_generators[supported_generators_selected_index])
 
     supported_algorithms_selected_index = 0
     supported_algorithms = list(search.ALGORITHMS.keys())
+    # Follows the edits of the maze and keeps the path up to date while enabled
+    live_replanning = False
+    planner = None
+    # Search running in the background, revealed a few visited nodes per frame
+    animation = None
+    animation_speed = 10
+    # Searches the junctions left once dead ends are filled and corridors compressed
+    prune_dead_ends = False
 
     while 1:
         for event in pygame.event.get():
@@ -54,6 +70,9 @@ def main():
         imgui.new_frame()
         imgui.begin("MazeSettings", flags=imgui.WINDOW_ALWAYS_AUTO_RESIZE)
         _, maze_size = imgui.slider_int("Maze size", maze_size, 10, 50)
+        generators_combo_changed, selected_generator = imgui.combo("Generator", supported_generators_selected_index, supported_generators)
+        if generators_combo_changed:
+            supported_generators_selected_index = selected_generator
         imgui.columns(2)
         generated_button_clicked = imgui.button("Generate")
         imgui.next_column()
@@ -64,19 +83,53 @@ def main():
         if algorithms_combo_changed:
             supported_algorithms_selected_index = selected_algorithm
         search_button_clicked = imgui.button("Search")
+        _, animation_speed = imgui.slider_int("Animation speed", animation_speed, 1, 500)
+        pause_button_clicked = imgui.button("Resume" if animation is not None and animation.paused else "Pause")
+        imgui.same_line()
+        skip_button_clicked = imgui.button("Skip")
+        _, prune_dead_ends = imgui.checkbox("Prune dead ends", prune_dead_ends)
+        _, live_replanning = imgui.checkbox("Live replanning", live_replanning)
         imgui.end()
 
+        if live_replanning and planner is None:
+            planner = DStarLite(maze)
+        elif not live_replanning and planner is not None:
+            planner.close()
+            planner = None
+
+        if search_button_clicked:
+            if animation is not None:
+                animation.cancel()
+            algorithm = search.ALGORITHMS[supported_algorithms[supported_algorithms_selected_index]]
+            if prune_dead_ends:
+                algorithm = reduction.reduced(algorithm)
+            animation = SearchAnimation(maze, algorithm)
+        if animation is not None:
+            if pause_button_clicked:
+                animation.paused = not animation.paused
+            if skip_button_clicked:
+                animation.skip()
+        if clear_button_clicked:
+            maze.clear()
+            if animation is not None:
+                animation.cancel()
+                animation = None
+
         gl.glClear(gl.GL_COLOR_BUFFER_BIT)
         gl.glClearColor(1, 1, 1, 1)
         if maze is not None:
+            if animation is not None:
+                animation.advance(animation_speed, ANIMATION_FRAME_BUDGET)
+                renderer.draw_cells(maze, animation.visited, COLORS["VISITED_NODE"])
+                if animation.path is not None:
+                    renderer.draw_cells(maze, animation.path, COLORS["PATH_NODE"])
+            if planner is not None:
+                planner.start = maze.starting_point
+                planner.goal = maze.goal
+                live_path = planner.replan()
+                if live_path is not None:
+                    renderer.draw_cells(maze, live_path, COLORS["PATH_NODE"])
             maze.draw()
-        if search_button_clicked:
-            visited, solution = search.ALGORITHMS[supported_algorithms[supported_algorithms_selected_index]](maze)
-            search.draw_visited(maze, visited)
-            if solution is not None:
-                search.draw_path(maze, solution)
-        if clear_button_clicked:
-            maze.clear()
 
         imgui.render()
         impl.render(imgui.get_draw_data())
@@ -84,7 +137,13 @@ def main():
         pygame.time.wait(16)
 
         if generated_button_clicked:
-            maze = Maze(maze_size)
+            maze = Maze(maze_size, supported_generators[supported_generators_selected_index])
+            if animation is not None:
+                animation.cancel()
+                animation = None
+            if planner is not None:
+                planner.close()
+                planner = DStarLite(maze)
 
 
 
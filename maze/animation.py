@@ -0,0 +1,161 @@
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from .grid import WallGrid
+from .maze import Maze
+from .observers import SearchAborted, SearchObserver
+
+# Number of visited nodes sent to the main thread at once
+CHUNK_SIZE = 256
+# Marker telling the main thread that the search restarted, such as a new depth of Iterative Deepening Search
+_RESTART = -1
+
+
+class _StreamingObserver(SearchObserver):
+    """
+    Sends the visited nodes of a search running in a worker thread to the main thread, in chunks.
+    """
+    def __init__(self, output: queue.SimpleQueue, cancelled: threading.Event) -> None:
+        self.output = output
+        self.cancelled = cancelled
+        self._chunk = []
+        self._list = None
+
+    def on_expand(self, node: int) -> None:
+        chunk = self._chunk
+        if self.visited_list is not self._list:
+            # A new visited list means the search started over
+            if self._list is not None:
+                chunk.append(_RESTART)
+            self._list = self.visited_list
+        chunk.append(node)
+        if len(chunk) >= CHUNK_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.cancelled.is_set():
+            raise SearchAborted("Animation cancelled")
+        if self._chunk:
+            self.output.put(("visited", self._chunk))
+            self._chunk = []
+
+
+class SearchAnimation:
+    """
+    Runs a search in a worker thread and reveals its visited nodes a few at a time, so that the display stays
+    responsive whatever the size of the maze.
+
+    The search works on a copy of the maze, which can be edited meanwhile. The main thread calls advance once per
+    frame, then draws visited and, once every visited node was revealed, path.
+    """
+    def __init__(self, maze: Maze, algorithm) -> None:
+        """
+        Starts the search.
+
+        :param maze: The maze to search.
+        :param algorithm: A search function (maze, observer=None), such as the values of search.ALGORITHMS.
+        """
+        self.visited = []
+        self.path = None
+        self.paused = False
+        self.skipping = False
+        self._revealed_path = None
+        self._pending = deque()
+        self._done = False
+        self._error = None
+        self._output = queue.SimpleQueue()
+        self._cancelled = threading.Event()
+        snapshot = Maze(generator=None, walls=WallGrid(maze.grid_length, maze.walls.masks.copy()))
+        snapshot.starting_point = maze.starting_point
+        snapshot.goal = maze.goal
+        if maze.node_costs is not None:
+            costs = maze.node_costs
+            for node in np.flatnonzero(costs != 1).tolist():
+                snapshot.set_node_cost(node, float(costs[node]))
+        self._thread = threading.Thread(target=self.__run, args=(snapshot, algorithm), daemon=True)
+        self._thread.start()
+
+    @property
+    def finished(self) -> bool:
+        """
+        Gets whether the search is over and every visited node was revealed.
+        """
+        return self._done and not self._pending
+
+    def advance(self, max_nodes: int, time_budget: float | None = None) -> None:
+        """
+        Reveals the next visited nodes received from the search. Meant to be called once per frame.
+
+        :param max_nodes: The number of nodes to reveal, ignored when skipping.
+        :param time_budget: The number of seconds this call may take, if any.
+        """
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        self.__receive(deadline)
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        if self.paused and not self.skipping:
+            return
+        count = len(self._pending) if self.skipping else max_nodes
+        pending = self._pending
+        visited = self.visited
+        while pending and count > 0:
+            node = pending.popleft()
+            if node == _RESTART:
+                visited.clear()
+                continue
+            visited.append(node)
+            count -= 1
+            # Checked from time to time only, the clock being slower than revealing a node
+            if deadline is not None and count % CHUNK_SIZE == 0 and time.perf_counter() > deadline:
+                break
+        if self.finished:
+            self.path = self._revealed_path
+
+    def skip(self) -> None:
+        """
+        Reveals every visited node as soon as it is received, then the path.
+        """
+        self.skipping = True
+
+    def cancel(self) -> None:
+        """
+        Stops the search. Nodes already received can still be revealed.
+        """
+        self._cancelled.set()
+
+    def __receive(self, deadline: float | None) -> None:
+        """
+        Moves the messages of the worker thread to the pending nodes.
+        """
+        while True:
+            try:
+                kind, value = self._output.get_nowait()
+            except queue.Empty:
+                return
+            if kind == "visited":
+                self._pending.extend(value)
+            elif kind == "done":
+                self._revealed_path = value
+                self._done = True
+            else:
+                self._error = value
+                self._done = True
+            if deadline is not None and time.perf_counter() > deadline:
+                return
+
+    def __run(self, maze: Maze, algorithm) -> None:
+        observer = _StreamingObserver(self._output, self._cancelled)
+        try:
+            _, path = algorithm(maze, observer=observer)
+            observer.flush()
+        except SearchAborted:
+            path = None
+        except Exception as error:
+            self._output.put(("error", error))
+            return
+        self._output.put(("done", path))
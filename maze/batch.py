@@ -0,0 +1,240 @@
+"""
+Headless batch solver.
+
+Runs every combination of mazes and search algorithms over a pool of processes and writes one JSON line per job.
+Mazes are either loaded from files saved with Maze.save, or generated from a size and a seed. Each maze is built
+once, then shared with the workers through shared memory rather than pickled for every job. Only a few mazes are
+shared at a time: the next ones are built as the jobs of the previous ones finish, so that runs over thousands of
+mazes use bounded memory.
+
+Example, from the root of the repository :
+
+    python -m maze.batch --size 100 --size 300 --seeds 0-9 --algorithm "A* Search" --output results.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from maze import Maze, search
+from maze.generators import GENERATORS
+from maze.grid import WallGrid
+from maze.observers import SearchStats
+
+# Number of mazes each worker process keeps attached
+WORKER_MAZES = 8
+# Number of mazes shared with the workers at a time, per worker
+SHARED_MAZES_PER_WORKER = 2
+
+# Mazes attached by the current worker process, by shared memory name, the least recently used first
+_worker_mazes = OrderedDict()
+
+
+def _share_maze(maze: Maze) -> shared_memory.SharedMemory:
+    """
+    Copies the walls of a maze into a new shared memory block.
+
+    :param maze: The maze to share.
+    :return: The shared memory block, to be closed and unlinked by the caller.
+    """
+    masks = maze.walls.masks
+    block = shared_memory.SharedMemory(create=True, size=max(masks.nbytes, 1))
+    np.ndarray(masks.shape, dtype=np.uint8, buffer=block.buf)[:] = masks
+    return block
+
+
+def _attach_maze(block_name: str, grid_length: int) -> Maze:
+    """
+    Builds a maze over walls in shared memory, keeping the most recently used ones attached.
+
+    :param block_name: The name of the shared memory block.
+    :param grid_length: The side length of the maze.
+    :return: The maze.
+    """
+    if block_name in _worker_mazes:
+        _worker_mazes.move_to_end(block_name)
+    else:
+        # Workers share the resource tracker of the parent process, which unlinks the block once every job is done
+        block = shared_memory.SharedMemory(name=block_name)
+        masks = np.ndarray((grid_length * grid_length,), dtype=np.uint8, buffer=block.buf)
+        _worker_mazes[block_name] = block, Maze(generator=None, walls=WallGrid(grid_length, masks))
+        while len(_worker_mazes) > WORKER_MAZES:
+            old_block, old_maze = _worker_mazes.popitem(last=False)[1]
+            # The arrays over the block have to be gone before it can be closed
+            del old_maze
+            old_block.close()
+    return _worker_mazes[block_name][1]
+
+
+def _reset_peak_rss() -> bool:
+    """
+    Resets the peak resident memory of the worker process to its current resident memory. Only works on Linux.
+
+    :return: Whether the peak could be reset.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _memory_kb(field: str) -> int:
+    """
+    Reads a memory figure of the worker process from /proc/self/status, such as "VmRSS" or "VmHWM".
+
+    :param field: The name of the field.
+    :return: Its value in kilobytes.
+    """
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise ValueError(f'No {field} in /proc/self/status')
+
+
+def solve(job: dict) -> dict:
+    """
+    Runs one search algorithm on one shared maze.
+
+    :param job: The job, holding the maze's shared memory block name, side length, starting point and goal,
+                and the algorithm name.
+    :return: The job, completed with the number of nodes expanded over the whole search, every iteration of Iterative
+             Deepening included, the path length, the wall time in seconds, and the peak resident memory of the worker
+             during the search and how much of it the search added, in kilobytes. Both memory figures are None where
+             the peak can't be reset between jobs, which is outside of Linux.
+    """
+    maze = _attach_maze(job["block"], job["grid_length"])
+    maze.starting_point = job["start"]
+    maze.goal = job["goal"]
+    # The peak of the whole process would otherwise hide the smaller jobs that follow a large one
+    baseline = _memory_kb("VmRSS") if _reset_peak_rss() else None
+    stats = SearchStats()
+    start_time = time.perf_counter()
+    _, path = search.ALGORITHMS[job["algorithm"]](maze, observer=stats)
+    wall_time = time.perf_counter() - start_time
+    peak = _memory_kb("VmHWM") if baseline is not None else None
+    result = {key: value for key, value in job.items() if key != "block"}
+    result.update(expanded_nodes=stats.expansions,
+                  path_length=len(path) if path is not None else None,
+                  wall_time=wall_time,
+                  peak_rss_kb=peak,
+                  job_rss_kb=peak - baseline if peak is not None else None)
+    return result
+
+
+def _parse_seeds(text: str) -> list[int]:
+    """
+    Parses a list of seeds such as "1,5,10-20".
+
+    :param text: The comma separated seeds or inclusive ranges of seeds.
+    :return: The list of seeds.
+    """
+    seeds = []
+    for part in text.split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            seeds.extend(range(int(first), int(last) + 1))
+        else:
+            seeds.append(int(part))
+    return seeds
+
+
+def _mazes(args: argparse.Namespace):
+    """
+    Yields the mazes to solve, with an identifier for the results.
+
+    :param args: The parsed command line arguments.
+    """
+    for path in args.maze:
+        yield path, Maze.load(path)
+    for size in args.size:
+        for seed in args.seeds:
+            yield f'{args.generator}:{size}:{seed}', Maze(size, args.generator, seed)
+
+
+def run(args: argparse.Namespace, output) -> None:
+    """
+    Runs every job and writes the results as JSON lines, in the order the jobs finish.
+
+    :param args: The parsed command line arguments.
+    :param output: The text file to write the results to.
+    """
+    workers = args.workers or os.cpu_count() or 1
+    # Shared blocks by name, with the number of their jobs still running
+    shared = {}
+    # Shared block name of each running job
+    futures = {}
+
+    def write_results(done) -> None:
+        for future in done:
+            output.write(json.dumps(future.result()) + "\n")
+            output.flush()
+            block_name = futures.pop(future)
+            block, remaining = shared[block_name]
+            if remaining > 1:
+                shared[block_name] = block, remaining - 1
+            else:
+                del shared[block_name]
+                block.close()
+                block.unlink()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for maze_id, maze in _mazes(args):
+                while len(shared) >= SHARED_MAZES_PER_WORKER * workers:
+                    write_results(wait(futures, return_when=FIRST_COMPLETED).done)
+                block = _share_maze(maze)
+                shared[block.name] = block, len(args.algorithm)
+                for algorithm in args.algorithm:
+                    futures[executor.submit(solve, {
+                        "maze": maze_id,
+                        "block": block.name,
+                        "grid_length": maze.grid_length,
+                        "start": maze.starting_point,
+                        "goal": maze.goal,
+                        "algorithm": algorithm,
+                    })] = block.name
+            while futures:
+                write_results(wait(futures, return_when=FIRST_COMPLETED).done)
+    finally:
+        for block, _ in shared.values():
+            block.close()
+            block.unlink()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m maze.batch", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--maze", action="append", default=[], help="A maze file saved with Maze.save. Repeatable.")
+    parser.add_argument("--size", action="append", type=int, default=[],
+                        help="The side length of mazes to generate. Repeatable.")
+    parser.add_argument("--seeds", type=_parse_seeds, default=[0],
+                        help='The seeds of the generated mazes, such as "0-9" or "1,4". Default is 0.')
+    parser.add_argument("--generator", choices=list(GENERATORS), default="Sidewinder",
+                        help="The generation algorithm of the generated mazes. Default is Sidewinder.")
+    parser.add_argument("--algorithm", action="append", choices=list(search.ALGORITHMS),
+                        help="A search algorithm to run. Repeatable. Default is all of them.")
+    parser.add_argument("--workers", type=int, default=None, help="The number of processes. Default is one per CPU.")
+    parser.add_argument("--output", help="The JSON lines file to write. Default is the standard output.")
+    args = parser.parse_args(argv)
+    if not args.maze and not args.size:
+        parser.error("at least one --maze or --size is required")
+    if args.algorithm is None:
+        args.algorithm = list(search.ALGORITHMS)
+
+    if args.output is None:
+        run(args, sys.stdout)
+    else:
+        with open(args.output, "w") as output:
+            run(args, output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Benchmark suite for maze construction, generation, search, obstacle editing and path retracing.
+
+Every case runs in its own process, so that its peak memory is measured on its own, with fixed seeds. Results are
+saved as JSON and can be compared with a baseline to catch regressions.
+
+Examples, from the root of the repository :
+
+    python -m maze.bench run --output baseline.json
+    python -m maze.bench run --size 10 --size 200 --output current.json
+    python -m maze.bench compare baseline.json current.json --threshold 0.1
+    python -m maze.bench imports --budget 0.03
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from maze import Maze, search
+from maze.generators import GENERATORS
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, peak memory isn't reported there
+    resource = None
+
+DEFAULT_SIZES = [10, 50, 200, 1000, 2000]
+SEED = 0
+# Number of cells turned into obstacles and cleared again by the editing case
+EDITED_CELLS = 100
+# Largest maze size for the cases that would take minutes above it
+SIZE_LIMITS = {
+    "search/Iterative Depth-deepening Search": 50,
+    "generate/Wilson": 200,
+}
+# Modules of the headless core, whose import time is measured, and packages of the rendering layer they must not import
+CORE_MODULES = ["maze.search", "maze.queries", "maze.replanning", "maze.storage", "maze.observers"]
+RENDERING_PACKAGES = ["OpenGL", "pygame", "config"]
+# Seconds the core may take to import on top of NumPy, which has to be imported anyway
+DEFAULT_IMPORT_BUDGET = 0.03
+
+
+def _retrace_path_case(maze: Maze):
+    """
+    Prepares the parents of a full Breadth-First Search, so that only the path retracing is timed.
+    """
+    masks, moves = maze.neighbour_index.masks, maze.neighbour_index.moves
+    parents = {}
+    queue = deque([maze.starting_point])
+    reached = {maze.starting_point}
+    while queue:
+        current = queue.popleft()
+        for move in moves[masks[current]]:
+            n = current + move
+            if n not in reached:
+                reached.add(n)
+                parents[n] = current
+                queue.append(n)
+    return lambda: search.retrace_path(maze, parents)
+
+
+def _editing_case(maze: Maze):
+    """
+    Prepares random cells to edit.
+    """
+    nodes = np.random.default_rng(SEED).integers(maze.adjacency_matrix_length, size=EDITED_CELLS).tolist()
+
+    def edit():
+        for node in nodes:
+            maze.set_node_as_obstacle(node)
+        for node in nodes:
+            maze.clear_node(node)
+    return edit
+
+
+def _prepare(case: str, size: int):
+    """
+    Builds what a benchmark case needs, outside of the timed section.
+
+    :param case: The case name, a kind and an optional name separated by a slash.
+    :param size: The side length of the maze.
+    :return: A function running the timed operation once. It returns the number of nodes it expanded, if any.
+    """
+    kind, _, name = case.partition("/")
+    if kind == "construct":
+        return lambda: Maze(size, generator=None)
+    if kind == "generate":
+        return lambda: Maze(size, name, SEED)
+    maze = Maze(size, seed=SEED)
+    if kind == "search":
+        algorithm = search.ALGORITHMS[name]
+        return lambda: len(algorithm(maze)[0])
+    if kind == "edit":
+        return _editing_case(maze)
+    if kind == "retrace":
+        return _retrace_path_case(maze)
+    raise ValueError(f'Unknown benchmark case {case}')
+
+
+def run_case(case: str, size: int, repeat: int) -> dict:
+    """
+    Runs a benchmark case several times.
+
+    :param case: The case name.
+    :param size: The side length of the maze.
+    :param repeat: The number of timed runs.
+    :return: The median and 95th percentile times in seconds, the node expansions per second for searches,
+             and the peak resident memory of the process in kilobytes.
+    """
+    operation = _prepare(case, size)
+    times = []
+    expanded = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = operation()
+        times.append(time.perf_counter() - start_time)
+        if isinstance(result, int):
+            expanded = result
+    median = statistics.median(times)
+    return {
+        "median": median,
+        "p95": float(np.percentile(times, 95)),
+        "runs": repeat,
+        "expansions_per_second": expanded / median if expanded is not None and median > 0 else None,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource is not None else None,
+    }
+
+
+def cases(sizes: list[int], selected: list[str] | None = None) -> list[tuple[str, int]]:
+    """
+    Lists the benchmark cases to run.
+
+    :param sizes: The side lengths of the mazes.
+    :param selected: Prefixes of the case names to keep, or None for all of them.
+    :return: The list of (case name, size).
+    """
+    names = ["construct"]
+    names += [f'generate/{name}' for name in GENERATORS]
+    names += [f'search/{name}' for name in search.ALGORITHMS]
+    names += ["edit", "retrace"]
+    if selected:
+        names = [name for name in names if any(name.startswith(prefix) for prefix in selected)]
+    return [(name, size) for size in sizes for name in names if size <= SIZE_LIMITS.get(name, size)]
+
+
+def run(sizes: list[int], repeat: int, selected: list[str] | None = None) -> dict:
+    """
+    Runs the benchmark cases, each one in a new process.
+
+    :param sizes: The side lengths of the mazes.
+    :param repeat: The number of timed runs of each case.
+    :param selected: Prefixes of the case names to keep, or None for all of them.
+    :return: The results, keyed by "case@size", along with a description of the environment.
+    """
+    results = {}
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+        for case, size in cases(sizes, selected):
+            key = f'{case}@{size}'
+            results[key] = executor.submit(run_case, case, size, repeat).result()
+            print(f'{key}: median {results[key]["median"]:.6f}s', file=sys.stderr)
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """
+    Compares the median times of the cases present in both results.
+
+    :param baseline: The reference results.
+    :param current: The new results.
+    :param threshold: The relative slowdown above which a case is a regression, 0.1 meaning 10 % slower.
+    :return: A description of each regression.
+    """
+    regressions = []
+    for key, result in current["results"].items():
+        reference = baseline["results"].get(key)
+        if reference is None or reference["median"] <= 0:
+            continue
+        ratio = result["median"] / reference["median"]
+        if ratio > 1 + threshold:
+            regressions.append(f'{key}: {reference["median"]:.6f}s -> {result["median"]:.6f}s ({ratio:.2f}x)')
+    return regressions
+
+
+def measure_imports(repeat: int) -> dict:
+    """
+    Measures the import time of the core modules, each run in a new interpreter so that nothing is cached in memory.
+
+    :param repeat: The number of interpreters to start.
+    :return: The median import times in seconds of NumPy and of the core on top of it, and the rendering packages
+             imported by the core.
+    """
+    code = (f'import sys, numpy; import {", ".join(CORE_MODULES)}; '
+            f'print(" ".join(sorted({{m.split(".")[0] for m in sys.modules}} & {set(RENDERING_PACKAGES)!r})))')
+    numpy_times, core_times = [], []
+    rendering = set()
+    for _ in range(repeat):
+        process = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                                 capture_output=True, text=True, check=True)
+        # The last line, since some packages print a banner when imported
+        rendering.update(process.stdout.splitlines()[-1].split() if process.stdout.strip() else [])
+        numpy_time = core_time = 0
+        for line in process.stderr.splitlines():
+            # "import time: self [us] | cumulative | name", top level imports having no indentation
+            fields = line.split("|")
+            if len(fields) != 3 or fields[2].startswith("  ") or not fields[1].strip().isdigit():
+                continue
+            name = fields[2].strip()
+            if name == "numpy":
+                numpy_time += int(fields[1])
+            elif name.split(".")[0] == "maze":
+                core_time += int(fields[1])
+        numpy_times.append(numpy_time / 1e6)
+        core_times.append(core_time / 1e6)
+    return {
+        "numpy": statistics.median(numpy_times),
+        "core": statistics.median(core_times),
+        "rendering_packages": sorted(rendering),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m maze.bench", description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="Run the benchmarks.")
+    run_parser.add_argument("--size", action="append", type=int,
+                            help=f'A maze side length. Repeatable. Default is {DEFAULT_SIZES}.')
+    run_parser.add_argument("--case", action="append",
+                            help='Only run the cases starting with this, such as "search/A*". Repeatable.')
+    run_parser.add_argument("--repeat", type=int, default=5, help="The number of timed runs of each case.")
+    run_parser.add_argument("--output", help="The JSON file to write. Default is the standard output.")
+    compare_parser = commands.add_parser("compare", help="Compare results with a baseline.")
+    compare_parser.add_argument("baseline", help="The JSON file of the reference results.")
+    compare_parser.add_argument("current", help="The JSON file of the new results.")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="The relative slowdown reported as a regression. Default is 0.1.")
+    imports_parser = commands.add_parser("imports",
+                                         help="Check that the core imports quickly and without the rendering layer.")
+    imports_parser.add_argument("--budget", type=float, default=DEFAULT_IMPORT_BUDGET,
+                                help=f'Seconds the core may take on top of NumPy. Default is {DEFAULT_IMPORT_BUDGET}.')
+    imports_parser.add_argument("--repeat", type=int, default=5, help="The number of interpreters to start.")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run(args.size or DEFAULT_SIZES, args.repeat, args.case)
+        if args.output is None:
+            json.dump(results, sys.stdout, indent=2)
+        else:
+            with open(args.output, "w") as output:
+                json.dump(results, output, indent=2)
+    elif args.command == "imports":
+        result = measure_imports(args.repeat)
+        print(f'numpy {result["numpy"]:.4f}s, core {result["core"]:.4f}s (budget {args.budget}s)')
+        failed = result["core"] > args.budget
+        if result["rendering_packages"]:
+            print(f'The core imported the rendering packages {", ".join(result["rendering_packages"])}')
+            failed = True
+        sys.exit(1 if failed else 0)
+    else:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        with open(args.current) as file:
+            current = json.load(file)
+        regressions = compare(baseline, current, args.threshold)
+        for regression in regressions:
+            print(regression)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
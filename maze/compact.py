@@ -0,0 +1,367 @@
+import heapq
+from collections import deque
+
+import numpy as np
+
+from .grid import WALL_BITS, TOP, RIGHT, BOTTOM, LEFT
+from .heuristics import manhattan
+from .maze import Maze
+
+# Parent and distance of the nodes that weren't reached
+UNREACHED = -1
+# Levels smaller than this are expanded node by node by level_bfs, NumPy calls costing more than a few iterations
+VECTOR_THRESHOLD = 64
+# Moves in each direction, in the order of the neighbour index
+_DIRECTION_BITS = np.array([WALL_BITS[TOP], WALL_BITS[RIGHT], WALL_BITS[BOTTOM], WALL_BITS[LEFT]], dtype=np.uint8)
+
+
+class SearchResult:
+    """
+    Result of a compact search, stored in NumPy arrays indexed by node ID rather than in Python lists, sets and dicts.
+
+    Breadth-First Search takes 9 bytes per cell, or 5 without the visit order, instead of more than 100. A* also
+    keeps the cost of every node reached, which adds 4 bytes per cell, or 8 when the maze has cell costs.
+    """
+    def __init__(self, visited: np.ndarray, parents: np.ndarray, order: np.ndarray | None, order_length: int,
+                 path: np.ndarray | None, distances: np.ndarray | None = None) -> None:
+        self._visited = visited
+        self._parents = parents
+        self._order = order
+        self._order_length = order_length
+        self._path = path
+        self._distances = distances
+
+    @property
+    def visited(self) -> np.ndarray:
+        """
+        Gets whether each node was reached, as a uint8 array indexed by node ID.
+        """
+        return self._visited
+
+    @property
+    def parents(self) -> np.ndarray:
+        """
+        Gets the parent of each node in the search tree, as an int32 array indexed by node ID.
+        The start is its own parent, and the nodes that weren't reached have UNREACHED.
+        """
+        return self._parents
+
+    @property
+    def order(self) -> np.ndarray | None:
+        """
+        Gets the nodes in the order they were reached, like the visited list of the search module.
+
+        :return: A view of the int32 order array, or None if the visit order wasn't recorded.
+        """
+        if self._order is None:
+            return None
+        return self._order[:self._order_length]
+
+    @property
+    def path(self) -> np.ndarray | None:
+        """
+        Gets the path from the start to the goal.
+
+        :return: An int32 array of node IDs, or None if the goal wasn't reached.
+        """
+        return self._path
+
+    @property
+    def distances(self) -> np.ndarray | None:
+        """
+        Gets the number of moves from the start to each node, as an int32 array indexed by node ID.
+        The nodes that weren't reached have UNREACHED.
+
+        :return: The distances, or None if the search didn't compute them.
+        """
+        return self._distances
+
+    @property
+    def visited_count(self) -> int:
+        """
+        Gets the number of nodes reached.
+        """
+        return int(np.count_nonzero(self._visited))
+
+
+def bfs(maze: Maze, record_order: bool = True, start: int | None = None,
+        goal: int | None = None) -> SearchResult:
+    """
+    Performs Breadth-First Search with compact state, visiting the nodes in the same order as search.bfs.
+    It reads the wall masks directly, so it doesn't need the neighbour index either.
+
+    :param maze: The maze to search.
+    :param record_order: Whether to record the visit order. Without it, only the current levels are kept in memory.
+    :param start: The node to start from. Default is the maze's starting point.
+    :param goal: The node to stop at. Default is the maze's goal. Pass -1 to explore every reachable node.
+    :return: The search result.
+    """
+    start = maze.starting_point if start is None else start
+    goal = maze.goal if goal is None else goal
+    count = maze.adjacency_matrix_length
+    visited_array = np.zeros(count, dtype=np.uint8)
+    parents_array = np.full(count, UNREACHED, dtype=np.int32)
+    # Indexing memoryviews is much faster than indexing arrays in a Python loop
+    visited = memoryview(visited_array)
+    parents = memoryview(parents_array)
+    masks = memoryview(maze.walls.masks)
+    step = maze.grid_length
+    visited[start] = 1
+    parents[start] = start
+    if record_order:
+        # The visit order of a Breadth-First Search is its queue
+        order_array = np.empty(count, dtype=np.int32)
+        queue = memoryview(order_array)
+        queue[0] = start
+        head, tail = 0, 1
+    else:
+        order_array = None
+        fifo = deque([start])
+    found = False
+    while True:
+        if record_order:
+            if head == tail:
+                break
+            current = queue[head]
+            head += 1
+        else:
+            if not fifo:
+                break
+            current = fifo.popleft()
+        if current == goal:
+            found = True
+            break
+        mask = masks[current]
+        # Clockwise, like the neighbour index
+        for bit, n in ((WALL_BITS[TOP], current - 1), (WALL_BITS[RIGHT], current + step),
+                       (WALL_BITS[BOTTOM], current + 1), (WALL_BITS[LEFT], current - step)):
+            if mask & bit or visited[n]:
+                continue
+            visited[n] = 1
+            parents[n] = current
+            if record_order:
+                queue[tail] = n
+                tail += 1
+            else:
+                fifo.append(n)
+    path = retrace_path(parents_array, start, goal) if found else None
+    return SearchResult(visited_array, parents_array, order_array, tail if record_order else 0, path)
+
+
+def a_star(maze: Maze, heuristic=manhattan, weight: float = 1.0, record_order: bool = True,
+           start: int | None = None, goal: int | None = None) -> SearchResult:
+    """
+    Performs A* Search with compact state, taking the cost of each cell into account.
+    With the zero heuristic, it is Uniform Cost Search.
+
+    The frontier is a binary heap whose outdated entries are skipped when popped, so that nothing but the heap is
+    stored per node outside of the arrays.
+
+    :param maze: The maze to search.
+    :param heuristic: A function (maze, node, goal) estimating the cost from node to goal. See maze.heuristics.
+    :param weight: The factor applied to the heuristic, see search.a_star.
+    :param record_order: Whether to record the order nodes are reached in.
+    :param start: The node to start from. Default is the maze's starting point.
+    :param goal: The goal node. Default is the maze's goal.
+    :return: The search result.
+    """
+    start = maze.starting_point if start is None else start
+    goal = maze.goal if goal is None else goal
+    count = maze.adjacency_matrix_length
+    # 1 when reached, 2 once expanded
+    visited_array = np.zeros(count, dtype=np.uint8)
+    parents_array = np.full(count, UNREACHED, dtype=np.int32)
+    # Every cost is a whole number of moves without cell costs, which int32 holds exactly in half the memory
+    if maze.node_costs is None:
+        costs_array = np.full(count, np.iinfo(np.int32).max, dtype=np.int32)
+    else:
+        costs_array = np.full(count, np.inf)
+    order_array = np.empty(count, dtype=np.int32) if record_order else None
+    visited = memoryview(visited_array)
+    parents = memoryview(parents_array)
+    costs = memoryview(costs_array)
+    order = memoryview(order_array) if record_order else None
+    masks = memoryview(maze.walls.masks)
+    node_costs = None if maze.node_costs is None else memoryview(maze.node_costs)
+    step = maze.grid_length
+    visited[start] = 1
+    parents[start] = start
+    costs[start] = 0
+    order_length = 0
+    if record_order:
+        order[0] = start
+        order_length = 1
+    # Entries are (priority, -cost, insertion order, node), ties going to the deepest node then the oldest entry
+    frontier = [(weight * heuristic(maze, start, goal), 0, 0, start)]
+    pushes = 1
+    found = False
+    while frontier:
+        _, negative_cost, _, node = heapq.heappop(frontier)
+        if visited[node] == 2 or -negative_cost > costs[node]:
+            continue
+        if node == goal:
+            found = True
+            break
+        visited[node] = 2
+        node_cost = costs[node]
+        mask = masks[node]
+        for bit, n in ((WALL_BITS[TOP], node - 1), (WALL_BITS[RIGHT], node + step),
+                       (WALL_BITS[BOTTOM], node + 1), (WALL_BITS[LEFT], node - step)):
+            if mask & bit or visited[n] == 2:
+                continue
+            cost = node_cost + (1 if node_costs is None else node_costs[n])
+            if cost >= costs[n]:
+                continue
+            if not visited[n]:
+                visited[n] = 1
+                if record_order:
+                    order[order_length] = n
+                    order_length += 1
+            costs[n] = cost
+            parents[n] = node
+            heapq.heappush(frontier, (cost + weight * heuristic(maze, n, goal), -cost, pushes, n))
+            pushes += 1
+    path = retrace_path(parents_array, start, goal) if found else None
+    return SearchResult(visited_array, parents_array, order_array, order_length, path)
+
+
+def level_bfs(maze: Maze, record_order: bool = True, start: int | None = None,
+              goal: int | None = None) -> SearchResult:
+    """
+    Performs a level-synchronous Breadth-First Search, expanding each whole level of the frontier with a few NumPy
+    operations: the wall masks of the frontier are tested against the four wall bits at once.
+
+    Each node gets the same parent and is reached in the same order as with bfs, and the result also holds the
+    distances. It only stops at the end of the goal's level, so it may reach a few more nodes than bfs.
+    Levels are expanded node by node while they are small, such as in the corridors of perfect mazes, so it is
+    mostly faster on open mazes, whose frontiers are wide.
+
+    :param maze: The maze to search.
+    :param record_order: Whether to record the visit order.
+    :param start: The node to start from. Default is the maze's starting point.
+    :param goal: The node to stop at. Default is the maze's goal. Pass -1 to explore every reachable node.
+    :return: The search result.
+    """
+    start = maze.starting_point if start is None else start
+    goal = maze.goal if goal is None else goal
+    count = maze.adjacency_matrix_length
+    visited = np.zeros(count, dtype=np.uint8)
+    parents = np.full(count, UNREACHED, dtype=np.int32)
+    distances = np.full(count, UNREACHED, dtype=np.int32)
+    order = np.empty(count, dtype=np.int32) if record_order else None
+    masks = maze.walls.masks
+    step = maze.grid_length
+    visited[start] = 1
+    parents[start] = start
+    distances[start] = 0
+    order_length = 0
+    if record_order:
+        order[0] = start
+        order_length = 1
+    visited_view = memoryview(visited)
+    parents_view = memoryview(parents)
+    distances_view = memoryview(distances)
+    order_view = memoryview(order) if record_order else None
+    masks_view = memoryview(masks)
+    # A list while the levels are small, an array once they are wide enough
+    frontier = [start]
+    level = 0
+    while len(frontier) and not (0 <= goal and visited_view[goal]):
+        level += 1
+        if isinstance(frontier, np.ndarray):
+            frontier = settle_level(masks, visited, parents, distances, frontier, level, step)
+            if record_order:
+                order[order_length:order_length + len(frontier)] = frontier
+                order_length += len(frontier)
+            if len(frontier) < VECTOR_THRESHOLD:
+                frontier = frontier.tolist()
+            continue
+        next_level = []
+        for node in frontier:
+            mask = masks_view[node]
+            for bit, n in ((WALL_BITS[TOP], node - 1), (WALL_BITS[RIGHT], node + step),
+                           (WALL_BITS[BOTTOM], node + 1), (WALL_BITS[LEFT], node - step)):
+                if mask & bit or visited_view[n]:
+                    continue
+                visited_view[n] = 1
+                parents_view[n] = node
+                distances_view[n] = level
+                next_level.append(n)
+                if record_order:
+                    order_view[order_length] = n
+                    order_length += 1
+        frontier = np.array(next_level, dtype=np.int64) if len(next_level) >= VECTOR_THRESHOLD else next_level
+    path = retrace_path(parents, start, goal) if 0 <= goal and visited[goal] else None
+    return SearchResult(visited, parents, order, order_length, path, distances)
+
+
+def expand_level(masks: np.ndarray, visited: np.ndarray, frontier: np.ndarray, step: int, low: int = 0,
+                 high: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the nodes of the next level of a Breadth-First Search and marks them as visited.
+
+    A node reached from several nodes of the frontier goes to the first of them, in the frontier's order, and the next
+    level is ordered by parent then direction, which is the order a queue would reach them in.
+
+    :param masks: The wall masks of the grid.
+    :param visited: The uint8 visited flags, updated in place.
+    :param frontier: The nodes of the current level, in visit order.
+    :param step: The side length of the grid.
+    :param low: The first node ID to keep in the next level.
+    :param high: The node ID after the last one to keep in the next level. Default is the end of the grid.
+    :return: The int64 nodes of the next level, and for each of them the index of its parent in the frontier times 4
+             plus the direction leading to it.
+    """
+    high = len(masks) if high is None else high
+    # One row per frontier node and one column per direction, so that flat indices are parent * 4 + direction
+    candidates = frontier[:, None] + np.array([-1, step, 1, -step])
+    keys = np.flatnonzero((masks[frontier][:, None] & _DIRECTION_BITS) == 0)
+    nodes = candidates.ravel()[keys]
+    if low > 0 or high < len(masks):
+        kept = (nodes >= low) & (nodes < high)
+        nodes, keys = nodes[kept], keys[kept]
+    kept = visited[nodes] == 0
+    nodes, keys = nodes[kept], keys[kept]
+    # Keys are increasing, so the first occurrence of a node is the one a queue would keep
+    _, first = np.unique(nodes, return_index=True)
+    first.sort()
+    nodes, keys = nodes[first], keys[first]
+    visited[nodes] = 1
+    return nodes, keys
+
+
+def settle_level(masks: np.ndarray, visited: np.ndarray, parents: np.ndarray, distances: np.ndarray,
+                 frontier: np.ndarray, level: int, step: int) -> np.ndarray:
+    """
+    Expands a level of a Breadth-First Search and records the parents and distances of the next one.
+
+    :return: The next level, in visit order.
+    """
+    nodes, keys = expand_level(masks, visited, frontier, step)
+    parents[nodes] = frontier[keys >> 2]
+    distances[nodes] = level
+    return nodes
+
+
+def retrace_path(parents: np.ndarray, start: int, goal: int) -> np.ndarray:
+    """
+    Retraces the path from the start to the goal through a parent array.
+
+    :param parents: The parent of each node, the start being its own parent.
+    :param start: The start's node ID.
+    :param goal: The goal's node ID, which must have been reached.
+    :return: The int32 array of the nodes from start to goal.
+    """
+    parent = memoryview(parents)
+    length = 1
+    node = goal
+    while node != start:
+        node = parent[node]
+        length += 1
+    path_array = np.empty(length, dtype=np.int32)
+    path = memoryview(path_array)
+    node = goal
+    for i in range(length - 1, -1, -1):
+        path[i] = node
+        node = parent[node]
+    return path_array
@@ -0,0 +1,167 @@
+class IndexedHeap:
+    """
+    Binary min-heap of nodes keyed by priority, with an index of each node's position in the heap.
+
+    The index gives O(1) membership tests and O(log n) decrease-key, so a node is never stored twice in the frontier.
+    Nodes with equal priorities are popped in insertion order. It is not thread-safe, and doesn't need to be.
+    """
+    def __init__(self) -> None:
+        # Entries are [priority, insertion order, node]
+        self._heap = []
+        self._positions = {}
+        self._counter = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __bool__(self) -> bool:
+        return bool(self._heap)
+
+    def __contains__(self, node: int) -> bool:
+        return node in self._positions
+
+    def priority(self, node: int):
+        """
+        Returns the priority of a node in the heap.
+
+        :param node: The node ID.
+        :return: Its current priority.
+        """
+        return self._heap[self._positions[node]][0]
+
+    def push(self, node: int, priority) -> None:
+        """
+        Adds a node to the heap.
+
+        :param node: The node ID, which must not already be in the heap.
+        :param priority: Its priority. Lower priorities are popped first.
+        """
+        if node in self._positions:
+            raise ValueError(f'Node {node} is already in the frontier')
+        entry = [priority, self._counter, node]
+        self._counter += 1
+        self._heap.append(entry)
+        self._positions[node] = len(self._heap) - 1
+        self._sift_up(len(self._heap) - 1)
+
+    def peek(self):
+        """
+        Returns the node with the lowest priority without removing it.
+
+        :return: A tuple (node, priority).
+        """
+        entry = self._heap[0]
+        return entry[2], entry[0]
+
+    def pop(self):
+        """
+        Removes the node with the lowest priority from the heap.
+
+        :return: A tuple (node, priority).
+        """
+        heap = self._heap
+        last = heap.pop()
+        if heap:
+            top = heap[0]
+            heap[0] = last
+            self._positions[last[2]] = 0
+            self._sift_down(0)
+        else:
+            top = last
+        del self._positions[top[2]]
+        return top[2], top[0]
+
+    def decrease_key(self, node: int, priority) -> None:
+        """
+        Lowers the priority of a node already in the heap.
+
+        :param node: The node ID.
+        :param priority: Its new priority, which must not be greater than the current one.
+        """
+        position = self._positions[node]
+        entry = self._heap[position]
+        if priority > entry[0]:
+            raise ValueError(f'New priority {priority} is greater than the current one {entry[0]}')
+        entry[0] = priority
+        self._sift_up(position)
+
+    def update(self, node: int, priority) -> None:
+        """
+        Changes the priority of a node already in the heap, up or down.
+
+        :param node: The node ID.
+        :param priority: Its new priority.
+        """
+        position = self._positions[node]
+        self._heap[position][0] = priority
+        self._sift_up(position)
+        self._sift_down(self._positions[node])
+
+    def remove(self, node: int) -> None:
+        """
+        Removes a node from the heap, wherever it is.
+
+        :param node: The node ID, which must be in the heap.
+        """
+        position = self._positions.pop(node)
+        heap = self._heap
+        last = heap.pop()
+        if position < len(heap):
+            heap[position] = last
+            self._positions[last[2]] = position
+            self._sift_up(position)
+            self._sift_down(self._positions[last[2]])
+
+    def push_or_decrease(self, node: int, priority) -> bool:
+        """
+        Adds a node to the heap, or lowers its priority if it is already there and the new one is lower.
+
+        :param node: The node ID.
+        :param priority: Its priority.
+        :return: True if the heap changed.
+        """
+        position = self._positions.get(node)
+        if position is None:
+            self.push(node, priority)
+            return True
+        if priority < self._heap[position][0]:
+            self.decrease_key(node, priority)
+            return True
+        return False
+
+    def _sift_up(self, position: int) -> None:
+        heap = self._heap
+        positions = self._positions
+        entry = heap[position]
+        while position > 0:
+            parent_position = (position - 1) >> 1
+            parent = heap[parent_position]
+            if entry < parent:
+                heap[position] = parent
+                positions[parent[2]] = position
+                position = parent_position
+            else:
+                break
+        heap[position] = entry
+        positions[entry[2]] = position
+
+    def _sift_down(self, position: int) -> None:
+        heap = self._heap
+        positions = self._positions
+        size = len(heap)
+        entry = heap[position]
+        child_position = 2 * position + 1
+        while child_position < size:
+            right_position = child_position + 1
+            if right_position < size and heap[right_position] < heap[child_position]:
+                child_position = right_position
+            child = heap[child_position]
+            if child < entry:
+                heap[position] = child
+                positions[child[2]] = position
+                position = child_position
+                child_position = 2 * position + 1
+            else:
+                break
+        heap[position] = entry
+        positions[entry[2]] = position
@@ -0,0 +1,397 @@
+# Maze generation algorithms.
+# Every generator takes a WallGrid where each cell is surrounded by four walls, and a NumPy random Generator. It removes
+# walls in place until the grid is a perfect maze, where every cell can be reached from any other one by exactly one
+# path. The same seed always gives the same maze.
+# For a 2000 x 2000 maze, Binary Tree and Sidewinder take about a third of a second, which is why Sidewinder is the
+# default of Maze. Eller and Kruskal, vectorized row by row and round by round, take one to three seconds. Depth-First
+# Search, Prim and Wilson carve one cell at a time in Python, which takes 10 seconds or more at that size, so they are
+# meant for mazes of a few hundred cells a side.
+# Annotations aren't evaluated, so that numpy.random is only imported when a maze is generated
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+import numpy as np
+
+from .grid import WallGrid, TOP, RIGHT, BOTTOM, LEFT, WALL_BITS, ALL_WALLS
+
+# Number of random floats drawn at once by the generators that can't know in advance how many they need
+_RANDOM_CHUNK = 1 << 16
+
+
+def _uniforms(rng: np.random.Generator) -> Iterator[float]:
+    """
+    Yields random floats in [0, 1), drawn from the generator by chunks, which is much faster than one call per float.
+
+    :param rng: The random generator.
+    """
+    while True:
+        yield from rng.random(_RANDOM_CHUNK).tolist()
+
+
+def _grid_directions(node: int, grid_length: int) -> list[int]:
+    """
+    Returns the directions in which a node has a neighbour inside the grid.
+
+    :param node: The node ID.
+    :param grid_length: The side length of the grid.
+    :return: The list of directions, clockwise.
+    """
+    x, y = divmod(node, grid_length)
+    directions = []
+    if y > 0:
+        directions.append(TOP)
+    if x < grid_length - 1:
+        directions.append(RIGHT)
+    if y < grid_length - 1:
+        directions.append(BOTTOM)
+    if x > 0:
+        directions.append(LEFT)
+    return directions
+
+
+def dfs_backtracker(walls: WallGrid, rng: np.random.Generator) -> None:
+    """
+    Generates a maze using iterative Depth-First Search (recursive backtracker).
+    Gives long, winding corridors with few dead ends. Each step depends on the previous one, so it runs in Python.
+
+    :param walls: The grid to carve.
+    :param rng: The random generator.
+    """
+    n = walls.grid_length
+    offsets = walls.offsets
+    uniforms = _uniforms(rng)
+    starting_cell = int(rng.integers(walls.cell_count))
+    stack = [starting_cell]
+    visited = bytearray(walls.cell_count)
+    visited[starting_cell] = 1
+    carved_nodes, carved_directions = [], []
+    while stack:
+        current = stack[-1]
+        unvisited_directions = [d for d in _grid_directions(current, n) if not visited[current + offsets[d]]]
+        if not unvisited_directions:
+            stack.pop()
+            continue
+        chosen_direction = unvisited_directions[int(next(uniforms) * len(unvisited_directions))]
+        chosen_neighbour = current + offsets[chosen_direction]
+        carved_nodes.append(current)
+        carved_directions.append(chosen_direction)
+        visited[chosen_neighbour] = 1
+        stack.append(chosen_neighbour)
+    walls.open_walls(carved_nodes, carved_directions)
+
+
+def _spanning_forest(heads: np.ndarray, tails: np.ndarray, weights: np.ndarray,
+                     count: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the spanning forest Kruskal's algorithm builds by taking the edges from the lightest to the heaviest, and
+    keeping those joining two trees. It uses Borůvka's algorithm instead, which gives the same forest but works on
+    every tree at once : each round, every tree keeps its lightest edge to another tree, then these trees are merged.
+    There are at most log2(count) rounds, each one vectorized over all the edges left.
+
+    :param heads: The first vertex of each edge, in [0, count).
+    :param tails: The second vertex of each edge.
+    :param weights: The weight of each edge. They must all be different, or the forest could have loops.
+    :param count: The number of vertices.
+    :return: A tuple containing a boolean array, True for the edges of the forest, and the tree of each vertex as
+             an array of labels in [0, number of trees).
+    """
+    kept = np.zeros(len(heads), dtype=bool)
+    labels = np.arange(count, dtype=heads.dtype)
+    edges = np.arange(len(heads), dtype=heads.dtype)
+    sentinel = np.iinfo(weights.dtype).max
+    while True:
+        outgoing = heads != tails
+        if not outgoing.all():
+            edges, heads, tails, weights = edges[outgoing], heads[outgoing], tails[outgoing], weights[outgoing]
+        if not len(edges):
+            return kept, labels
+        lightest = np.full(count, sentinel, dtype=weights.dtype)
+        np.minimum.at(lightest, heads, weights)
+        np.minimum.at(lightest, tails, weights)
+        from_head = lightest[heads] == weights
+        from_tail = lightest[tails] == weights
+        kept[edges[from_head | from_tail]] = True
+        # Every tree points to the tree at the other end of its lightest edge. The two trees sharing the same lightest
+        # edge point to each other, and the smaller one becomes the root of the merged tree.
+        parents = np.arange(count, dtype=heads.dtype)
+        parents[heads[from_head]] = tails[from_head]
+        parents[tails[from_tail]] = heads[from_tail]
+        smaller = np.minimum(heads[from_head & from_tail], tails[from_head & from_tail])
+        parents[smaller] = smaller
+        while True:
+            grandparents = parents[parents]
+            if np.array_equal(grandparents, parents):
+                break
+            parents = grandparents
+        roots = parents == np.arange(count, dtype=heads.dtype)
+        merged = (np.cumsum(roots, dtype=heads.dtype) - 1)[parents]
+        count = int(np.count_nonzero(roots))
+        labels = merged[labels]
+        heads, tails = merged[heads], merged[tails]
+
+
+def kruskal(walls: WallGrid, rng: np.random.Generator) -> None:
+    """
+    Generates a maze using randomized Kruskal's algorithm : inner walls are removed in random order whenever they
+    separate two cells that aren't connected yet. The walls are given random weights and removed all at once with
+    _spanning_forest, which takes about 2 seconds for a 2000 x 2000 maze.
+    Gives many short dead ends.
+
+    :param walls: The grid to carve.
+    :param rng: The random generator.
+    """
+    n = walls.grid_length
+    nodes = np.arange(walls.cell_count, dtype=np.int32).reshape(n, n)
+    # Cells left of a right wall, then above a bottom wall, in node ID order so that the first rounds read memory in
+    # order. The weights are random, with the index of the wall in their low bits so that they are all different.
+    right_nodes = nodes[:-1, :].ravel()
+    bottom_nodes = nodes[:, :-1].ravel()
+    edge_nodes = np.concatenate([right_nodes, bottom_nodes])
+    edge_others = np.concatenate([right_nodes + n, bottom_nodes + 1])
+    edge_directions = np.repeat(np.array([RIGHT, BOTTOM]), [len(right_nodes), len(bottom_nodes)])
+    shift = len(edge_nodes).bit_length()
+    weights = (rng.integers(1 << (62 - shift), size=len(edge_nodes)) << shift) | np.arange(len(edge_nodes))
+    kept, _ = _spanning_forest(edge_nodes, edge_others, weights, walls.cell_count)
+    walls.open_walls(edge_nodes[kept], edge_directions[kept])
+
+
+def prim(walls: WallGrid, rng: np.random.Generator) -> None:
+    """
+    Generates a maze using randomized Prim's algorithm : the maze grows from a random cell by connecting a random
+    cell of its border at each step.
+    Gives short corridors radiating from the starting cell. Each step depends on the previous one, so it runs in Python.
+
+    :param walls: The grid to carve.
+    :param rng: The random generator.
+    """
+    n = walls.grid_length
+    offsets = walls.offsets
+    uniforms = _uniforms(rng)
+    in_maze = bytearray(walls.cell_count)
+    in_frontier = bytearray(walls.cell_count)
+    frontier = []
+
+    def add(node: int) -> None:
+        in_maze[node] = 1
+        for d in _grid_directions(node, n):
+            neighbour = node + offsets[d]
+            if not in_maze[neighbour] and not in_frontier[neighbour]:
+                in_frontier[neighbour] = 1
+                frontier.append(neighbour)
+
+    add(int(rng.integers(walls.cell_count)))
+    carved_nodes, carved_directions = [], []
+    while frontier:
+        # Swap the chosen cell with the last one to remove it in O(1)
+        i = int(next(uniforms) * len(frontier))
+        frontier[i], frontier[-1] = frontier[-1], frontier[i]
+        cell = frontier.pop()
+        maze_directions = [d for d in _grid_directions(cell, n) if in_maze[cell + offsets[d]]]
+        carved_nodes.append(cell)
+        carved_directions.append(maze_directions[int(next(uniforms) * len(maze_directions))])
+        add(cell)
+    walls.open_walls(carved_nodes, carved_directions)
+
+
+def wilson(walls: WallGrid, rng: np.random.Generator) -> None:
+    """
+    Generates a maze using Wilson's algorithm : loop-erased random walks from each cell until they reach the maze.
+    Gives a uniformly random spanning tree, without the bias of the other algorithms, but is slow to start.
+
+    :param walls: The grid to carve.
+    :param rng: The random generator.
+    """
+    n = walls.grid_length
+    offsets = walls.offsets
+    uniforms = _uniforms(rng)
+    order = rng.permutation(walls.cell_count).tolist()
+    in_maze = bytearray(walls.cell_count)
+    in_maze[order[0]] = 1
+    # Last direction taken when leaving each cell during the current walk, which erases loops implicitly
+    exits = bytearray(walls.cell_count)
+    carved_nodes, carved_directions = [], []
+    for start in order[1:]:
+        if in_maze[start]:
+            continue
+        current = start
+        while not in_maze[current]:
+            directions = _grid_directions(current, n)
+            direction = directions[int(next(uniforms) * len(directions))]
+            exits[current] = direction
+            current += offsets[direction]
+        current = start
+        while not in_maze[current]:
+            in_maze[current] = 1
+            carved_nodes.append(current)
+            carved_directions.append(exits[current])
+            current += offsets[exits[current]]
+    walls.open_walls(carved_nodes, carved_directions)
+
+
+def eller_rows(width: int, height: int | None, rng: np.random.Generator) -> Iterator[np.ndarray]:
+    """
+    Generates a maze row by row using Eller's algorithm, keeping only the state of the current row.
+
+    Each cell of a row belongs to a set of cells connected through the rows above. Adjacent cells of different sets
+    are randomly joined, then every set goes down to the next row through at least one cell. The last row joins all
+    the remaining sets. Each row is vectorized, the joins with _spanning_forest, which takes about 1.5 seconds for a
+    2000 x 2000 maze.
+
+    :param width: The number of cells in a row.
+    :param height: The number of rows, or None to generate rows forever. The maze is only perfect once its last row
+                   was generated, before that some of its parts may only be connected through rows yet to come.
+    :param rng: The random generator.
+    :return: An iterator over the rows, from top to bottom. Each row is a uint8 array of the wall masks of its cells,
+             from left to right.
+    """
+    # Set of each cell of the current row, and the cells joining two sets from left to right
+    sets = np.arange(width)
+    links = np.arange(width - 1)
+    top_open = np.zeros(width, dtype=bool)
+    y = 0
+    while height is None or y < height:
+        last_row = y == height - 1 if height is not None else False
+        _, sets = np.unique(sets, return_inverse=True)
+        joins = links if last_row else links[rng.random(width - 1) < 0.5]
+        # Joining from left to right, and never within a set, keeps the spanning forest whose edges weigh their x
+        kept, merged = _spanning_forest(sets[joins], sets[joins + 1], joins, int(sets.max()) + 1)
+        sets = merged[sets]
+        right_open = np.zeros(width, dtype=bool)
+        right_open[joins[kept]] = True
+
+        bottom_open = np.zeros(width, dtype=bool)
+        if not last_row:
+            bottom_open = rng.random(width) < 0.5
+            going_down = np.zeros(int(sets.max()) + 1, dtype=bool)
+            going_down[sets[bottom_open]] = True
+            # Sets that don't go down yet do through one of their cells, taken at random
+            order = rng.permutation(width)
+            order = order[~going_down[sets[order]]]
+            _, first = np.unique(sets[order], return_index=True)
+            bottom_open[order[first]] = True
+
+        row = np.full(width, ALL_WALLS, dtype=np.uint8)
+        row[top_open] &= ~WALL_BITS[TOP] & ALL_WALLS
+        row[right_open] &= ~WALL_BITS[RIGHT] & ALL_WALLS
+        row[1:][right_open[:-1]] &= ~WALL_BITS[LEFT] & ALL_WALLS
+        row[bottom_open] &= ~WALL_BITS[BOTTOM] & ALL_WALLS
+        yield row
+
+        # Cells that didn't go down start a new set in the next row
+        sets = np.where(bottom_open, sets, width + np.arange(width))
+        top_open = bottom_open
+        y += 1
+
+
+def _transposed_masks() -> np.ndarray:
+    """
+    Builds the table mapping each wall mask to the mask of the same cell once the grid is mirrored along its
+    diagonal, which swaps the top and left walls, and the right and bottom ones.
+
+    :return: A uint8 array of 16 masks, indexed by the original mask.
+    """
+    table = np.zeros(16, dtype=np.uint8)
+    swaps = ((TOP, LEFT), (LEFT, TOP), (RIGHT, BOTTOM), (BOTTOM, RIGHT))
+    for mask in range(16):
+        for before, after in swaps:
+            if mask & WALL_BITS[before]:
+                table[mask] |= WALL_BITS[after]
+    return table
+
+
+_TRANSPOSED_MASKS = _transposed_masks()
+
+
+def eller_stream(line_length: int, rng: np.random.Generator,
+                 line_count: int | None = None) -> Iterator[np.ndarray]:
+    """
+    Streams a maze in node ID order using Eller's algorithm, in O(line_length) memory.
+
+    Node IDs follow the cells of a given x from top to bottom, so each line of the stream holds the cells sharing
+    the same x : the rows of eller_rows, mirrored along the diagonal of the grid.
+
+    :param line_length: The number of cells in a line, which is the height of the maze.
+    :param rng: The random generator.
+    :param line_count: The number of lines, which is the width of the maze, or None to stream lines forever.
+    :return: An iterator over the lines, from left to right. Each line is a uint8 array of the wall masks of its
+             cells, from top to bottom.
+    """
+    for row in eller_rows(line_length, line_count, rng):
+        yield _TRANSPOSED_MASKS[row]
+
+
+def eller(walls: WallGrid, rng: np.random.Generator) -> None:
+    """
+    Generates a maze using Eller's algorithm. See eller_rows.
+
+    :param walls: The grid to carve.
+    :param rng: The random generator.
+    """
+    n = walls.grid_length
+    masks = np.empty((n, n), dtype=np.uint8)
+    for x, line in enumerate(eller_stream(n, rng, n)):
+        masks[x] = line
+    walls.load_masks(masks)
+
+
+def binary_tree(walls: WallGrid, rng: np.random.Generator) -> None:
+    """
+    Generates a maze using the Binary Tree algorithm : every cell opens either its top or its left wall.
+    Fully vectorized, but the top row and left column are always straight corridors.
+
+    :param walls: The grid to carve.
+    :param rng: The random generator.
+    """
+    n = walls.grid_length
+    nodes = np.arange(walls.cell_count)
+    x, y = np.divmod(nodes, n)
+    carve_top = rng.random(walls.cell_count) < 0.5
+    carve_top[x == 0] = True
+    carve_top[y == 0] = False
+    directions = np.where(carve_top, TOP, LEFT)
+    # The top left cell has nowhere to go
+    walls.open_walls(nodes[1:], directions[1:])
+
+
+def sidewinder(walls: WallGrid, rng: np.random.Generator) -> None:
+    """
+    Generates a maze using the Sidewinder algorithm : each row is cut into random runs of cells joined horizontally,
+    and each run opens the top wall of one of its cells. Vectorized over the whole grid.
+    The top row is always a straight corridor.
+
+    :param walls: The grid to carve.
+    :param rng: The random generator.
+    """
+    n = walls.grid_length
+    # Indexed [y, x], so that the runs of each row are contiguous once flattened
+    closes_run = rng.random((n, n)) < 0.5
+    closes_run[0, :] = False
+    closes_run[:, -1] = True
+    closes_run = closes_run.ravel()
+    run_ends = np.flatnonzero(closes_run)
+    run_starts = np.concatenate([[0], run_ends[:-1] + 1])
+    lengths = run_ends - run_starts + 1
+    chosen = run_starts + (rng.random(len(run_starts)) * lengths).astype(np.int64)
+    # Runs of the top row have nowhere to go up
+    chosen = chosen[chosen >= n]
+
+    def to_nodes(indices: np.ndarray) -> np.ndarray:
+        y, x = np.divmod(indices, n)
+        return x * n + y
+
+    right_nodes = to_nodes(np.flatnonzero(~closes_run))
+    top_nodes = to_nodes(chosen)
+    walls.open_walls(np.concatenate([right_nodes, top_nodes]),
+                     np.concatenate([np.full(len(right_nodes), RIGHT), np.full(len(top_nodes), TOP)]))
+
+
+GENERATORS = {
+    "Depth-First Search": dfs_backtracker,
+    "Kruskal": kruskal,
+    "Prim": prim,
+    "Wilson": wilson,
+    "Eller": eller,
+    "Binary Tree": binary_tree,
+    "Sidewinder": sidewinder,
+}
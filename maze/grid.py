@@ -0,0 +1,212 @@
+import numpy as np
+
+# Directions are ordered clockwise, like the neighbours returned by Maze.get_neighbours
+TOP, RIGHT, BOTTOM, LEFT = 0, 1, 2, 3
+DIRECTIONS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+OPPOSITE = (BOTTOM, LEFT, TOP, RIGHT)
+WALL_BITS = (1, 2, 4, 8)
+ALL_WALLS = 0b1111
+
+
+class WallGrid:
+    """
+    Stores the walls of a square maze as one 4-bit mask per cell, packed in a uint8 NumPy array.
+
+    Bit ``WALL_BITS[d]`` of a cell is set when there is a wall in direction ``d``. A wall between two adjacent cells
+    is stored on both sides, and the outer border of the grid is always walled, so a cleared bit always leads to a
+    cell inside the grid.
+    """
+    def __init__(self, grid_length: int, masks: np.ndarray | None = None) -> None:
+        """
+        Creates a grid where every cell is surrounded by four walls.
+
+        :param grid_length: The side length of the grid.
+        :param masks: Existing uint8 masks to use, in node ID order, such as a memory-mapped file. They aren't copied.
+        """
+        self.grid_length = grid_length
+        self.cell_count = grid_length * grid_length
+        # Offset to add to a node ID to move one cell in each direction
+        self.offsets = (-1, grid_length, 1, -grid_length)
+        if masks is None:
+            masks = np.full(self.cell_count, ALL_WALLS, dtype=np.uint8)
+        elif masks.shape != (self.cell_count,) or masks.dtype != np.uint8:
+            raise ValueError(f'Expected {self.cell_count} uint8 masks')
+        self.masks = masks
+        # Incremented on every change, so that derived structures know when to rebuild
+        self.version = 0
+        self._listeners = []
+
+    def subscribe(self, callback) -> None:
+        """
+        Registers a function called after every change of the walls.
+
+        The callback receives the list of node IDs whose mask changed, or None when the whole grid changed.
+
+        :param callback: The function to call.
+        """
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback) -> None:
+        """
+        Removes a function registered with subscribe.
+
+        :param callback: The function to remove.
+        """
+        self._listeners.remove(callback)
+
+    def _notify(self, nodes: list[int] | None) -> None:
+        self.version += 1
+        for callback in self._listeners:
+            callback(nodes)
+
+    def neighbour(self, node: int, direction: int) -> int:
+        """
+        Returns the node next to another one in a given direction.
+
+        :param node: The node ID.
+        :param direction: One of TOP, RIGHT, BOTTOM or LEFT.
+        :return: The neighbour's node ID, or -1 if it is outside the grid.
+        """
+        x, y = divmod(node, self.grid_length)
+        dx, dy = DIRECTIONS[direction]
+        x, y = x + dx, y + dy
+        if 0 <= x < self.grid_length and 0 <= y < self.grid_length:
+            return x * self.grid_length + y
+        return -1
+
+    def direction_to(self, node: int, other: int) -> int:
+        """
+        Returns the direction leading from a node to an adjacent one.
+
+        :param node: The node ID we start from.
+        :param other: The adjacent node ID.
+        :return: One of TOP, RIGHT, BOTTOM or LEFT.
+        """
+        for direction in range(4):
+            if self.neighbour(node, direction) == other:
+                return direction
+        raise ValueError(f'Nodes {node} and {other} are not adjacent')
+
+    def has_wall(self, node: int, direction: int) -> bool:
+        """
+        Tells whether a node has a wall in a given direction.
+
+        :param node: The node ID.
+        :param direction: One of TOP, RIGHT, BOTTOM or LEFT.
+        :return: True if the movement in that direction is blocked.
+        """
+        return bool(self.masks[node] & WALL_BITS[direction])
+
+    def open_neighbours(self, node: int) -> list[int]:
+        """
+        Returns the nodes that can be reached from a node in one move, ordered clockwise.
+
+        :param node: The node ID.
+        :return: The list of reachable neighbour node IDs.
+        """
+        mask = int(self.masks[node])
+        offsets = self.offsets
+        return [node + offsets[d] for d in range(4) if not mask & WALL_BITS[d]]
+
+    def set_wall(self, node: int, direction: int, wall: bool) -> None:
+        """
+        Adds or removes the wall between a node and its neighbour in a given direction.
+        Walls on the border of the grid are left untouched.
+
+        :param node: The node ID.
+        :param direction: One of TOP, RIGHT, BOTTOM or LEFT.
+        :param wall: True to build the wall, False to remove it.
+        """
+        other = self.neighbour(node, direction)
+        if other == -1:
+            return
+        bit = WALL_BITS[direction]
+        opposite_bit = WALL_BITS[OPPOSITE[direction]]
+        if wall:
+            self.masks[node] |= bit
+            self.masks[other] |= opposite_bit
+        else:
+            self.masks[node] &= ~bit & ALL_WALLS
+            self.masks[other] &= ~opposite_bit & ALL_WALLS
+        self._notify([node, other])
+
+    def set_all_walls(self, node: int, wall: bool) -> None:
+        """
+        Adds or removes the four walls around a node.
+
+        :param node: The node ID.
+        :param wall: True to build the walls, False to remove them.
+        """
+        # All four walls change before a single notification, so listeners repair their state once per edit
+        nodes = [node]
+        for direction in range(4):
+            other = self.neighbour(node, direction)
+            if other == -1:
+                continue
+            bit = WALL_BITS[direction]
+            opposite_bit = WALL_BITS[OPPOSITE[direction]]
+            if wall:
+                self.masks[node] |= bit
+                self.masks[other] |= opposite_bit
+            else:
+                self.masks[node] &= ~bit & ALL_WALLS
+                self.masks[other] &= ~opposite_bit & ALL_WALLS
+            nodes.append(other)
+        self._notify(nodes)
+
+    def open_walls(self, nodes: np.ndarray, directions: np.ndarray) -> None:
+        """
+        Removes many walls at once, each one given by a node and a direction.
+        Walls on the border of the grid are left untouched.
+
+        :param nodes: The node IDs.
+        :param directions: The direction of the wall to remove for each node, one of TOP, RIGHT, BOTTOM or LEFT.
+        """
+        nodes = np.asarray(nodes, dtype=np.int64)
+        directions = np.asarray(directions)
+        n = self.grid_length
+        cleared = np.zeros(self.cell_count, dtype=np.uint8)
+        for direction in range(4):
+            selected = nodes[directions == direction]
+            x, y = np.divmod(selected, n)
+            x, y = x + DIRECTIONS[direction][0], y + DIRECTIONS[direction][1]
+            selected = selected[(x >= 0) & (x < n) & (y >= 0) & (y < n)]
+            cleared[selected] |= WALL_BITS[direction]
+            cleared[selected + self.offsets[direction]] |= WALL_BITS[OPPOSITE[direction]]
+        self.masks &= ~cleared
+        self._notify(None)
+
+    def load_masks(self, masks: np.ndarray) -> None:
+        """
+        Replaces the masks of every cell. Both sides of each wall must agree, and the border must be walled.
+
+        :param masks: The new masks, either indexed by node ID or as an (N, N) array indexed by (x, y).
+        """
+        self.masks[:] = np.asarray(masks, dtype=np.uint8).reshape(self.cell_count)
+        self._notify(None)
+
+    def open_all(self) -> None:
+        """
+        Removes every wall inside the grid, keeping only its outer border.
+        """
+        n = self.grid_length
+        masks = np.zeros((n, n), dtype=np.uint8)
+        masks[:, 0] |= WALL_BITS[TOP]
+        masks[-1, :] |= WALL_BITS[RIGHT]
+        masks[:, -1] |= WALL_BITS[BOTTOM]
+        masks[0, :] |= WALL_BITS[LEFT]
+        self.masks[:] = masks.ravel()
+        self._notify(None)
+
+    def to_adjacency_matrix(self) -> np.ndarray:
+        """
+        Builds the dense adjacency matrix equivalent to the walls of the grid.
+
+        :return: A (N², N²) matrix holding 1 between nodes that are connected, 0 elsewhere.
+        """
+        matrix = np.zeros((self.cell_count, self.cell_count))
+        nodes = np.arange(self.cell_count)
+        for direction in range(4):
+            open_nodes = nodes[(self.masks & WALL_BITS[direction]) == 0]
+            matrix[open_nodes, open_nodes + self.offsets[direction]] = 1
+        return matrix
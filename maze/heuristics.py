@@ -0,0 +1,55 @@
+import math
+
+from maze import Maze
+
+# Extra cost of a diagonal move compared to two straight moves, used by the octile distance
+_DIAGONAL_SAVING = math.sqrt(2) - 2
+
+
+def manhattan(maze: Maze, node: int, goal: int) -> float:
+    """
+    Manhattan distance between two nodes, the exact cost in an empty 4-connected grid.
+
+    :param maze: The maze being searched.
+    :param node: The node ID.
+    :param goal: The goal's node ID.
+    :return: The estimated cost from node to goal.
+    """
+    x1, y1 = divmod(node, maze.grid_length)
+    x2, y2 = divmod(goal, maze.grid_length)
+    return abs(x1 - x2) + abs(y1 - y2)
+
+
+def octile(maze: Maze, node: int, goal: int) -> float:
+    """
+    Octile distance between two nodes, the exact cost in an empty 8-connected grid.
+    It never exceeds the Manhattan distance, so it is admissible, but less informed, on 4-connected mazes.
+
+    :param maze: The maze being searched.
+    :param node: The node ID.
+    :param goal: The goal's node ID.
+    :return: The estimated cost from node to goal.
+    """
+    x1, y1 = divmod(node, maze.grid_length)
+    x2, y2 = divmod(goal, maze.grid_length)
+    dx, dy = abs(x1 - x2), abs(y1 - y2)
+    return dx + dy + _DIAGONAL_SAVING * min(dx, dy)
+
+
+def zero(maze: Maze, node: int, goal: int) -> float:
+    """
+    Null heuristic. A* then behaves like Uniform Cost Search.
+
+    :param maze: The maze being searched.
+    :param node: The node ID.
+    :param goal: The goal's node ID.
+    :return: Always 0.
+    """
+    return 0
+
+
+HEURISTICS = {
+    "Manhattan": manhattan,
+    "Octile": octile,
+    "Zero": zero,
+}
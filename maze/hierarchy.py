@@ -0,0 +1,355 @@
+import heapq
+from collections import deque
+
+from .grid import WALL_BITS, TOP, RIGHT, BOTTOM, LEFT
+from .heuristics import manhattan
+from .maze import Maze
+
+INFINITY = float("inf")
+# Runs of open passages across a border at least this long get a transition at each end instead of one in the middle
+SPLIT_LENGTH = 6
+
+
+class HierarchicalIndex:
+    """
+    Answers long-distance path queries with Hierarchical Path-Finding A* (HPA*).
+
+    The grid is split into square clusters. Where a run of open passages crosses the border between two clusters, one
+    or two of them become transitions, whose cells are the entrances of both clusters. The cost between each pair of
+    entrances of a cluster, moving inside it, is precomputed, which gives an abstract graph much smaller than the maze.
+    A query links the start and the goal to the entrances of their clusters, searches the abstract graph with A*, then
+    refines each abstract edge into cells with a search bounded to one cluster.
+
+    Paths may be slightly longer than the shortest ones, since they only cross borders at transitions. On perfect
+    mazes, whose passages between clusters are isolated, every passage is a transition and paths are shortest.
+
+    Wall changes are received from the maze's walls and only invalidate the clusters they touch, which are rebuilt on
+    the next query. Changes of the cell costs aren't notified, and must be reported with invalidate.
+    """
+    def __init__(self, maze: Maze, cluster_size: int = 16, heuristic=manhattan) -> None:
+        """
+        Creates the index and subscribes to the changes of the maze's walls. Clusters are only built on the first query.
+
+        :param maze: The maze to answer queries on.
+        :param cluster_size: The side length of the clusters, in cells.
+        :param heuristic: A consistent function (maze, node, goal) estimating the cost between two nodes.
+        """
+        self.maze = maze
+        self.cluster_size = cluster_size
+        self.heuristic = heuristic
+        # Number of cells reached by the last query, in the abstract graph and in clusters
+        self.expansions = 0
+        # Number of clusters whose entrance costs were computed again by the last query
+        self.rebuilt_clusters = 0
+        self._clusters_per_side = -(-maze.grid_length // cluster_size)
+        # Transitions (cell, other cell) across the right or bottom border of each cluster, by (cluster, direction)
+        self._transitions = {}
+        # Cells on the other side of the transitions of each entrance
+        self._crossings = {}
+        # For each cluster, the (entrance, cost) pairs each of its entrances can reach inside it
+        self._intra = {}
+        # Clusters touched since the last query, or None when every cluster has to be built
+        self._dirty = None
+        self._walls = maze.walls
+        self._walls.subscribe(self.invalidate)
+
+    def invalidate(self, nodes: list[int] | None = None) -> None:
+        """
+        Reports cells whose walls or cost changed. Wall changes are reported automatically.
+
+        :param nodes: The node IDs of the cells, or None if the whole maze changed.
+        """
+        if nodes is None or self._dirty is None:
+            self._dirty = None
+        else:
+            self._dirty.update(self.cluster_of(node) for node in nodes)
+
+    def close(self) -> None:
+        """
+        Stops following the changes of the maze's walls.
+        """
+        self._walls.unsubscribe(self.invalidate)
+
+    def cluster_of(self, node: int) -> int:
+        """
+        Returns the cluster a node belongs to.
+
+        :param node: The node ID.
+        :return: The cluster ID, numbered like node IDs.
+        """
+        x, y = divmod(node, self.maze.grid_length)
+        return (x // self.cluster_size) * self._clusters_per_side + y // self.cluster_size
+
+    def path(self, start: int, goal: int) -> list[int] | None:
+        """
+        Finds a path between two nodes.
+
+        :param start: The start's node ID.
+        :param goal: The goal's node ID.
+        :return: The list of nodes from start to goal, or None if the goal can't be reached.
+        """
+        result = self.__search(start, goal)
+        return None if result is None else result[1]
+
+    def distance(self, start: int, goal: int) -> float | None:
+        """
+        Finds the cost of a path between two nodes.
+
+        :param start: The start's node ID.
+        :param goal: The goal's node ID.
+        :return: The cost of the path found by path, or None if the goal can't be reached.
+        """
+        result = self.__search(start, goal)
+        return None if result is None else result[0]
+
+    def __search(self, start: int, goal: int) -> tuple[float, list[int]] | None:
+        self.__refresh()
+        self.expansions = 0
+        if start == goal:
+            return 0.0, [start]
+        start_cluster, goal_cluster = self.cluster_of(start), self.cluster_of(goal)
+        start_costs, _ = self.__local_search(start, start_cluster)
+        goal_costs, _ = self.__local_search(goal, goal_cluster, reverse=True)
+        self.expansions += len(start_costs) + len(goal_costs)
+        start_edges = [(e, start_costs[e]) for e in self.__entrances(start_cluster) if e != start and e in start_costs]
+        if goal in start_costs:
+            start_edges.append((goal, start_costs[goal]))
+        goal_edges = {e: goal_costs[e] for e in self.__entrances(goal_cluster) if e != goal and e in goal_costs}
+
+        # A* on the abstract graph, whose nodes are the entrances, the start and the goal
+        maze = self.maze
+        node_costs = maze.node_costs
+        crossings = self._crossings
+        intra = self._intra
+        costs = {start: 0.0}
+        parents = {start: None}
+        frontier = [(self.heuristic(maze, start, goal), 0.0, start)]
+        while frontier:
+            _, cost, node = heapq.heappop(frontier)
+            if cost > costs[node]:
+                continue
+            if node == goal:
+                break
+            self.expansions += 1
+            edges = start_edges if node == start else intra[self.cluster_of(node)].get(node, ())
+            edges = list(edges)
+            for other in crossings.get(node, ()):
+                edges.append((other, 1.0 if node_costs is None else float(node_costs[other])))
+            if node in goal_edges:
+                edges.append((goal, goal_edges[node]))
+            for other, edge_cost in edges:
+                new_cost = cost + edge_cost
+                if new_cost < costs.get(other, INFINITY):
+                    costs[other] = new_cost
+                    parents[other] = node
+                    heapq.heappush(frontier, (new_cost + self.heuristic(maze, other, goal), new_cost, other))
+        else:
+            return None
+
+        abstract_path = [goal]
+        while parents[abstract_path[-1]] is not None:
+            abstract_path.append(parents[abstract_path[-1]])
+        abstract_path.reverse()
+        path = [start]
+        for node, next_node in zip(abstract_path, abstract_path[1:]):
+            if next_node in crossings.get(node, ()):
+                path.append(next_node)
+                continue
+            _, local_parents = self.__local_search(node, self.cluster_of(node), next_node)
+            segment = [next_node]
+            while segment[-1] != node:
+                segment.append(local_parents[segment[-1]])
+            path.extend(reversed(segment[:-1]))
+        return costs[goal], path
+
+    def __refresh(self) -> None:
+        """
+        Rebuilds the transitions and entrance costs of the clusters touched since the last query.
+        """
+        count = self._clusters_per_side ** 2
+        if self._dirty is None:
+            self._transitions = {}
+            self._crossings = {}
+            self._intra = {}
+            touched = range(count)
+        else:
+            touched = self._dirty
+        stale = set(touched)
+        for cluster in touched:
+            for border in self.__borders(cluster):
+                transitions = self.__find_transitions(*border)
+                old = self._transitions.get(border)
+                if transitions == old:
+                    continue
+                self.__set_transitions(border, old or [], transitions)
+                # The entrances of the clusters on both sides changed
+                side, direction = border
+                stale.add(side)
+                stale.add(side + (self._clusters_per_side if direction == RIGHT else 1))
+        for cluster in stale:
+            self.__build_intra(cluster)
+        self.rebuilt_clusters = len(stale)
+        self._dirty = set()
+
+    def __borders(self, cluster: int) -> list[tuple[int, int]]:
+        """
+        Returns the borders of a cluster with its neighbours, each one as the cluster on its left or top side and the
+        direction leading across it.
+        """
+        per_side = self._clusters_per_side
+        cluster_x, cluster_y = divmod(cluster, per_side)
+        borders = []
+        if cluster_x < per_side - 1:
+            borders.append((cluster, RIGHT))
+        if cluster_y < per_side - 1:
+            borders.append((cluster, BOTTOM))
+        if cluster_x > 0:
+            borders.append((cluster - per_side, RIGHT))
+        if cluster_y > 0:
+            borders.append((cluster - 1, BOTTOM))
+        return borders
+
+    def __bounds(self, cluster: int) -> tuple[int, int, int, int]:
+        """
+        Returns the cells of a cluster, as the ranges [x0, x1) and [y0, y1) of their coordinates.
+        """
+        cluster_x, cluster_y = divmod(cluster, self._clusters_per_side)
+        k, n = self.cluster_size, self.maze.grid_length
+        return cluster_x * k, min(cluster_x * k + k, n), cluster_y * k, min(cluster_y * k + k, n)
+
+    def __find_transitions(self, cluster: int, direction: int) -> list[tuple[int, int]]:
+        """
+        Finds the transitions across the right or bottom border of a cluster.
+        """
+        n = self.maze.grid_length
+        x0, x1, y0, y1 = self.__bounds(cluster)
+        if direction == RIGHT:
+            cells = [(x1 - 1) * n + y for y in range(y0, y1)]
+            step, along = n, BOTTOM
+        else:
+            cells = [x * n + y1 - 1 for x in range(x0, x1)]
+            step, along = 1, RIGHT
+        masks = memoryview(self.maze.walls.masks)
+        bit, along_bit = WALL_BITS[direction], WALL_BITS[along]
+        transitions = []
+        run = []
+        # The sentinel closes the last run
+        for cell in cells + [None]:
+            if cell is not None and not masks[cell] & bit:
+                # A run only goes on while the cells on both sides of the border are connected to the previous ones
+                previous = run[-1] if run else None
+                if previous is not None and (masks[previous] & along_bit or masks[previous + step] & along_bit):
+                    self.__add_run(transitions, run, step)
+                    run = []
+                run.append(cell)
+                continue
+            self.__add_run(transitions, run, step)
+            run = []
+        return transitions
+
+    @staticmethod
+    def __add_run(transitions: list[tuple[int, int]], run: list[int], step: int) -> None:
+        """
+        Adds the transitions of a run of passages across a border.
+        """
+        if len(run) >= SPLIT_LENGTH:
+            transitions.append((run[0], run[0] + step))
+            transitions.append((run[-1], run[-1] + step))
+        elif run:
+            middle = run[len(run) // 2]
+            transitions.append((middle, middle + step))
+        return transitions
+
+    def __set_transitions(self, border: tuple[int, int], old: list[tuple[int, int]],
+                          transitions: list[tuple[int, int]]) -> None:
+        crossings = self._crossings
+        for cell, other in old:
+            for a, b in ((cell, other), (other, cell)):
+                crossings[a].discard(b)
+                if not crossings[a]:
+                    del crossings[a]
+        for cell, other in transitions:
+            crossings.setdefault(cell, set()).add(other)
+            crossings.setdefault(other, set()).add(cell)
+        self._transitions[border] = transitions
+
+    def __entrances(self, cluster: int) -> list[int]:
+        """
+        Returns the cells of a cluster that are part of a transition.
+        """
+        entrances = set()
+        for border in self.__borders(cluster):
+            for cell, other in self._transitions.get(border, ()):
+                entrances.add(cell if border[0] == cluster else other)
+        return sorted(entrances)
+
+    def __build_intra(self, cluster: int) -> None:
+        """
+        Computes the cost between each pair of entrances of a cluster.
+        """
+        entrances = self.__entrances(cluster)
+        edges = {}
+        for entrance in entrances:
+            costs, _ = self.__local_search(entrance, cluster)
+            edges[entrance] = [(other, costs[other]) for other in entrances if other != entrance and other in costs]
+        self._intra[cluster] = edges
+
+    def __local_search(self, source: int, cluster: int, target: int | None = None,
+                       reverse: bool = False) -> tuple[dict[int, float], dict[int, int | None]]:
+        """
+        Finds the cheapest paths from a node to the other nodes of its cluster, without leaving it.
+
+        :param source: The node to search from.
+        :param cluster: The cluster of the node.
+        :param target: A node to stop at, if any.
+        :param reverse: Whether to compute the costs from each node to the source instead.
+        :return: The cost and parent of each node reached.
+        """
+        n = self.maze.grid_length
+        x0, x1, y0, y1 = self.__bounds(cluster)
+        masks = memoryview(self.maze.walls.masks)
+        node_costs = self.maze.node_costs
+        costs = {source: 0.0}
+        parents = {source: None}
+
+        def neighbours(node: int) -> list[int]:
+            x, y = divmod(node, n)
+            mask = masks[node]
+            result = []
+            if y > y0 and not mask & WALL_BITS[TOP]:
+                result.append(node - 1)
+            if x < x1 - 1 and not mask & WALL_BITS[RIGHT]:
+                result.append(node + n)
+            if y < y1 - 1 and not mask & WALL_BITS[BOTTOM]:
+                result.append(node + 1)
+            if x > x0 and not mask & WALL_BITS[LEFT]:
+                result.append(node - n)
+            return result
+
+        if node_costs is None:
+            queue = deque([source])
+            while queue:
+                node = queue.popleft()
+                if node == target:
+                    break
+                for other in neighbours(node):
+                    if other not in costs:
+                        costs[other] = costs[node] + 1
+                        parents[other] = node
+                        queue.append(other)
+            return costs, parents
+        frontier = [(0.0, source)]
+        while frontier:
+            cost, node = heapq.heappop(frontier)
+            if cost > costs[node]:
+                continue
+            if node == target:
+                break
+            for other in neighbours(node):
+                # Moving into a cell costs the cost of that cell, so going back to the source costs that of node
+                new_cost = cost + float(node_costs[node if reverse else other])
+                if new_cost < costs.get(other, INFINITY):
+                    costs[other] = new_cost
+                    parents[other] = node
+                    heapq.heappush(frontier, (new_cost, other))
+        return costs, parents
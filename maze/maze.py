@@ -1,32 +1,54 @@
-import random
+from __future__ import annotations
 
-from OpenGL.GL import *
-from utils.util import coords_to_glcoords
-import pygame
-from config.constants import COLORS
 import numpy as np
+from .generators import GENERATORS
+from .grid import WallGrid
+from .neighbours import NeighbourIndex
+from .storage import MazeHeader, read_maze, write_maze
 class Maze:
     """
     Represents a square Maze.
 
-    The maze is represented as a graph with its adjacency matrix storing possible movements between nodes.
+    The maze is represented as a grid of cells, each one storing a 4-bit mask of the walls around it.
 
     Each node can be represented in two ways : Its nodeID, or a tuple of integers (x,y) representing its coordinates
     in a square grid.
     """
-    def __init__(self, grid_length=10) -> None:
+    def __init__(self, grid_length=10, generator: str | None = "Sidewinder", seed: int | None = None,
+                 walls: WallGrid | None = None) -> None:
         """
         Creates a square maze
         :param grid_length: The side length of the maze. Default is 10
+        :param generator: The name of the generation algorithm, a key of generators.GENERATORS. Default is
+                          Sidewinder, which is vectorized and fast at any size. None keeps the walls as they are.
+        :param seed: The seed of the random generator. A random one is picked if None.
+        :param walls: Existing walls to use instead of new ones, in which case grid_length is ignored.
         """
+        if walls is not None:
+            grid_length = walls.grid_length
         # We suppose a square grid
         self.grid_length = grid_length
         # a.k.a the number of nodes
         self.adjacency_matrix_length = grid_length * grid_length
-        self.__adjacency_matrix = np.zeros((self.adjacency_matrix_length, self.adjacency_matrix_length))
+        self.__walls = walls if walls is not None else WallGrid(grid_length)
+        # Dense adjacency matrix, only built when the grid property is used
+        self.__adjacency_matrix = None
+        self.__adjacency_matrix_version = -1
+        # Decodes the neighbours of each cell from its walls for the search algorithms, created on first use
+        self.__neighbour_index = None
+        # Draws the maze with OpenGL, created on first draw
+        self.__renderer = None
+        # Cost of entering each cell, None while every move costs 1
+        self.__node_costs = None
         self._starting_point = 0
         self._goal = self.adjacency_matrix_length - 1
-        self.__generate_maze()
+        if seed is None and generator is not None:
+            seed = int(np.random.default_rng().integers(2 ** 63))
+        # Kept so that the maze can be generated again
+        self.seed = seed
+        self.generator = generator
+        if generator is not None:
+            self.__generate_maze(np.random.default_rng(seed))
 
         
     def get_node_id(self, pos: tuple[int, int]) -> int:
@@ -90,40 +112,97 @@ class Maze:
         :param node: Can be either a tuple of (x, y) or an integer node ID.
         :return: A list of visitable neighbour node IDs.
         """
-        neighours = self.get_neighbours(node)
         if isinstance(node, tuple):
+            if not self.position_in_range(node):
+                raise ValueError(f'Position {node} out of range of the the grid')
             node = self.get_node_id(node)
-        return [x for x in neighours if x != -1 and self.__adjacency_matrix[node][x] > 0]
-
-
-    def __generate_maze(self, starting_cell: int | None = None):
-        """
-        Generates a random, perfect maze using iterative Depth-First Search
-        :param starting_cell: The starting node for the maze generation.
-        """
-        if starting_cell is None:
-            starting_cell = random.randint(0, self.adjacency_matrix_length - 1)
-        stack = [starting_cell]
-        visited = {starting_cell}
-        while stack:
-            current = stack.pop()
-            neighbours = self.get_neighbours(current)
-            unvisited_neighbours = [x for x in neighbours if x not in visited and x != -1]
-            if  unvisited_neighbours:
-                stack.append(current)
-                chosen_neighbour = random.choice(unvisited_neighbours)
-                self.__adjacency_matrix[current][chosen_neighbour] = 1
-                self.__adjacency_matrix[chosen_neighbour][current] = 1
-                stack.append(chosen_neighbour)
-                visited.add(chosen_neighbour)
+        elif node >= self.adjacency_matrix_length:
+            raise ValueError(f'Node {node} is not part of the maze')
+        return list(self.neighbour_index.neighbours(node))
+
+    def iter_neighbours(self, node: int) -> tuple[int, ...]:
+        """
+        Returns the visitable neighbours of a node, without any validation of the argument.
+        Search algorithms decode them from neighbour_index.masks and neighbour_index.moves in their inner loop instead.
+
+        :param node: The integer node ID.
+        :return: A tuple of visitable neighbour node IDs, ordered clockwise.
+        """
+        return self.neighbour_index.neighbours(node)
+
+
+    def __generate_maze(self, rng: np.random.Generator):
+        """
+        Generates a random, perfect maze using the maze's generation algorithm
+        :param rng: The random generator.
+        """
+        if self.generator not in GENERATORS:
+            raise ValueError(f'Unknown generator {self.generator}')
+        GENERATORS[self.generator](self.__walls, rng)
+
+    def save(self, path, cell_bits: int = 8):
+        """
+        Saves the maze's walls, starting point, goal and seed in the binary maze format. See maze.storage.
+
+        :param path: The path of the file to write.
+        :param cell_bits: The number of bits stored per cell : 8 to allow memory-mapping on load, 4 to halve the size
+                          of the file, which then has to be unpacked into memory on load.
+        """
+        header = MazeHeader(cell_bits, self.grid_length, self.grid_length, self.starting_point, self.goal, self.seed)
+        write_maze(path, self.__walls.masks, header)
+
+    @classmethod
+    def load(cls, path, mmap: bool = True) -> "Maze":
+        """
+        Loads a maze saved in the binary maze format.
+
+        :param path: The path of the file to read.
+        :param mmap: Whether to memory-map the file. Mazes saved with 8 bits per cell, the default, then open
+                     instantly, their pages being read from disk as the searches reach their cells, and changes are
+                     never written back to the file.
+        :return: The loaded maze.
+        """
+        header, masks = read_maze(path, mmap)
+        if header.width != header.height:
+            raise ValueError(f'Mazes are square, {path} is {header.width}x{header.height}')
+        maze = cls(generator=None, seed=header.seed, walls=WallGrid(header.width, masks))
+        maze.starting_point = header.start
+        maze.goal = header.goal
+        return maze
+
+    @property
+    def walls(self) -> WallGrid:
+        """
+        Returns the wall masks of the maze.
+
+        :return: The WallGrid storing the maze.
+        """
+        return self.__walls
+
+    @property
+    def neighbour_index(self) -> NeighbourIndex:
+        """
+        Returns the decoder of the visitable neighbours, created on first access.
+        It reads the walls in place, so it is always up to date and takes no memory of its own.
+
+        :return: The NeighbourIndex of the maze.
+        """
+        if self.__neighbour_index is None:
+            self.__neighbour_index = NeighbourIndex(self.__walls)
+        return self.__neighbour_index
 
     @property
     def grid(self):
         """
         Returns the adjacency matrix representing the maze.
+        It is built from the walls on first access, and rebuilt only after the walls have changed.
+        Its size is quadratic in the number of nodes, so it should be avoided on big mazes.
 
         :return: The adjacency matrix.
         """
+        if self.__adjacency_matrix_version != self.__walls.version:
+            self.__adjacency_matrix = self.__walls.to_adjacency_matrix()
+            self.__adjacency_matrix_version = self.__walls.version
         return self.__adjacency_matrix
 
     @property
@@ -166,12 +245,57 @@ class Maze:
             node = self.get_node_id(node)
         self._goal = node
 
+    @property
+    def node_costs(self) -> np.ndarray | None:
+        """
+        Gets the cost of entering each cell, indexed by node ID.
+
+        :return: The array of costs, or None if every move costs 1.
+        """
+        return self.__node_costs
+
+    @property
+    def edge_costs(self) -> None:
+        """
+        Gets the cost of each move between two nodes, for graphs whose moves cost more than the cell they enter.
+        Moves in a maze only cost the cell they enter, so it is always None. See maze.reduction.ReducedMaze.
+        """
+        return None
+
+    def get_node_cost(self, node: int | tuple[int, int]) -> float:
+        """
+        Gets the cost of moving into a cell from any of its neighbours.
+
+        :param node: The node ID or coordinates of the cell.
+        :return: The cost of entering the cell.
+        """
+        if isinstance(node, tuple):
+            node = self.get_node_id(node)
+        if self.__node_costs is None:
+            return 1.0
+        return float(self.__node_costs[node])
+
+    def set_node_cost(self, node: int | tuple[int, int], cost: float):
+        """
+        Sets the cost of moving into a cell from any of its neighbours, making the maze weighted.
+
+        :param node: The node ID or coordinates of the cell.
+        :param cost: The new cost. Must be positive.
+        """
+        if isinstance(node, tuple):
+            node = self.get_node_id(node)
+        if cost <= 0:
+            raise ValueError(f'Cost {cost} must be positive')
+        if self.__node_costs is None:
+            self.__node_costs = np.ones(self.adjacency_matrix_length)
+        self.__node_costs[node] = cost
+
 
     def clear(self):
         """
         Clears the Maze by removing all walls.
         """
-        self.__adjacency_matrix = np.ones((self.adjacency_matrix_length, self.adjacency_matrix_length))
+        self.__walls.open_all()
 
     def set_node_as_obstacle(self, node: int | tuple[int, int]):
         """
@@ -182,10 +306,7 @@ class Maze:
         if isinstance(node, tuple):
             node = self.get_node_id(node)
 
-        neighbours = self.get_neighbours(node)
-        for n in neighbours:
-            self.__adjacency_matrix[n][node] = 0
-            self.__adjacency_matrix[node][n] = 0
+        self.__walls.set_all_walls(node, True)
 
     def clear_node(self, node: int | tuple[int, int]):
         """
@@ -196,89 +317,23 @@ class Maze:
         if isinstance(node, tuple):
             node = self.get_node_id(node)
 
-        neighbours = self.get_neighbours(node)
-        for n in neighbours:
-            self.__adjacency_matrix[n][node] = 1
-            self.__adjacency_matrix[node][n] = 1
+        self.__walls.set_all_walls(node, False)
+
+    @property
+    def renderer(self):
+        """
+        Returns the renderer drawing the maze with OpenGL, creating it on first access.
+
+        :return: The MazeRenderer of the maze.
+        """
+        if self.__renderer is None:
+            # Imported here so that the maze can be used without a display
+            from .renderer import MazeRenderer
+            self.__renderer = MazeRenderer(self)
+        return self.__renderer
 
     def draw(self):
         """
         Draws the maze.
         """
-        wall_color = COLORS["WALL_COLOR"]
-        line_thickness = 3.0
-        screen_size = pygame.display.get_window_size()
-        screen_width, screen_height = screen_size
-        cell_size = screen_width / self.grid_length
-
-        # On colorie le début en bleu
-        start_x, start_y = self.get_coordinate(self.starting_point)
-        start_cell_x = start_x * cell_size
-        start_cell_y = start_y * cell_size
-        start_cell_x_end = start_cell_x + cell_size
-        start_cell_y_end = start_cell_y + cell_size
-
-        glColor3f(*COLORS["STARTING_NODE"])
-        glBegin(GL_QUADS)
-        glVertex2f(*coords_to_glcoords((start_cell_x, start_cell_y), screen_size))
-        glVertex2f(*coords_to_glcoords((start_cell_x_end, start_cell_y), screen_size))
-        glVertex2f(*coords_to_glcoords((start_cell_x_end, start_cell_y_end), screen_size))
-        glVertex2f(*coords_to_glcoords((start_cell_x, start_cell_y_end), screen_size))
-        glEnd()
-
-        # On colorie la destination en Rouge
-        goal_x, goal_y = self.get_coordinate(self.goal)
-        goal_cell_x = goal_x * cell_size
-        goal_cell_y = goal_y * cell_size
-        goal_cell_x_end = goal_cell_x + cell_size
-        goal_cell_y_end = goal_cell_y + cell_size
-
-        glColor3f(*COLORS["GOAL_NODE"])
-        glBegin(GL_QUADS)
-        glVertex2f(*coords_to_glcoords((goal_cell_x, goal_cell_y), screen_size))
-        glVertex2f(*coords_to_glcoords((goal_cell_x_end, goal_cell_y), screen_size))
-        glVertex2f(*coords_to_glcoords((goal_cell_x_end, goal_cell_y_end), screen_size))
-        glVertex2f(*coords_to_glcoords((goal_cell_x, goal_cell_y_end), screen_size))
-        glEnd()
-
-        for node in range(self.adjacency_matrix_length):
-            x, y = self.get_coordinate(node)
-            neighbours = self.get_neighbours((x, y))
-            cell_x = x * cell_size
-            cell_y = y * cell_size
-            cell_x_end = cell_x + cell_size
-            cell_y_end = cell_y + cell_size
-
-            glLineWidth(line_thickness)
-            glColor3i(*wall_color)
-            # On dessine les murs avec chaque voisin
-
-            glBegin(GL_LINES)
-            # Voisin du dessus
-            if neighbours[0] == -1 or self.grid[node][neighbours[0]] == 0:
-                x1, y1 = coords_to_glcoords((cell_x, cell_y), screen_size)
-                x2, y2 = coords_to_glcoords((cell_x_end, cell_y), screen_size)
-                glVertex2f(x1, y1)
-                glVertex2f(x2, y2)
-
-            # Voisin de droite
-            if neighbours[1] == -1 or self.grid[node][neighbours[1]] == 0:
-                x1, y1 = coords_to_glcoords((cell_x_end, cell_y), screen_size)
-                x2, y2 = coords_to_glcoords((cell_x_end, cell_y_end), screen_size)
-                glVertex2f(x1, y1)
-                glVertex2f(x2, y2)
-
-            # Voisin du dessous
-            if neighbours[2] == -1 or self.grid[node][neighbours[2]] == 0:
-                x1, y1 = coords_to_glcoords((cell_x, cell_y_end), screen_size)
-                x2, y2 = coords_to_glcoords((cell_x_end, cell_y_end), screen_size)
-                glVertex2f(x1, y1)
-                glVertex2f(x2, y2)
-
-            # Voisin de gauche
-            if neighbours[3] == -1 or self.grid[node][neighbours[3]] == 0:
-                x1, y1 = coords_to_glcoords((cell_x, cell_y), screen_size)
-                x2, y2 = coords_to_glcoords((cell_x, cell_y_end), screen_size)
-                glVertex2f(x1, y1)
-                glVertex2f(x2, y2)
-            glEnd()
+        self.renderer.draw()
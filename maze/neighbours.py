@@ -0,0 +1,41 @@
+from .grid import WallGrid, WALL_BITS
+
+
+class NeighbourIndex:
+    """
+    Decodes the visitable neighbours of the nodes of a WallGrid straight from its wall masks.
+
+    The neighbours of ``node`` are ``node + move`` for each ``move`` in ``moves[masks[node]]``:
+    - ``masks`` is a memoryview of the wall masks, which reads them in place and gives Python ints. Memory-mapped
+      masks are only read as the searches reach them.
+    - ``moves`` holds, for each of the 16 masks, the tuple of node ID offsets of its open sides, ordered clockwise.
+
+    Search algorithms index both in their inner loop, which takes no memory beyond the masks, allocates nothing per
+    expansion, and always sees the current walls.
+    """
+    def __init__(self, walls: WallGrid) -> None:
+        """
+        :param walls: The walls of the maze.
+        """
+        self.walls = walls
+        self.masks = memoryview(walls.masks)
+        offsets = walls.offsets
+        self.moves = tuple(tuple(offsets[d] for d in range(4) if not mask & WALL_BITS[d]) for mask in range(16))
+
+    def neighbours(self, node: int) -> tuple[int, ...]:
+        """
+        Returns the visitable neighbours of a node, ordered clockwise.
+
+        :param node: The node ID.
+        :return: The neighbour node IDs.
+        """
+        return tuple(node + move for move in self.moves[self.masks[node]])
+
+    def degree(self, node: int) -> int:
+        """
+        Returns the number of visitable neighbours of a node.
+
+        :param node: The node ID.
+        :return: The number of neighbours.
+        """
+        return len(self.moves[self.masks[node]])
@@ -0,0 +1,331 @@
+import functools
+import time
+from collections import deque
+
+from .frontier import IndexedHeap
+
+
+class SearchAborted(Exception):
+    """
+    Raised by an observer to stop a search. The search then returns the nodes visited so far and no path.
+    """
+
+
+class SearchObserver:
+    """
+    Receives the events of a search. Every hook does nothing by default, subclasses override the ones they need.
+
+    The search algorithms only send events when an observer is given : they then use frontier and visited list
+    containers that call the hooks, and the plain containers otherwise, so unobserved searches pay nothing.
+    Any hook can raise SearchAborted to stop the search cleanly.
+    """
+    # The visited list of the running search, returned if the search is aborted
+    visited_list = None
+
+    def on_start(self, maze) -> None:
+        """
+        Called before the search starts.
+
+        :param maze: The maze being searched.
+        """
+
+    def on_phase(self, name: str) -> None:
+        """
+        Called when the search moves to another phase, such as a new depth of Iterative Deepening Search
+        or the other side of a bidirectional search. Searches start in the "search" phase.
+
+        :param name: The name of the new phase.
+        """
+
+    def on_push(self, node: int) -> None:
+        """
+        Called when a node is added to the frontier.
+
+        :param node: The node ID.
+        """
+
+    def on_pop(self, node: int) -> None:
+        """
+        Called when a node is removed from the frontier.
+
+        :param node: The node ID.
+        """
+
+    def on_decrease(self, node: int) -> None:
+        """
+        Called when the priority of a node already in the frontier is lowered.
+
+        :param node: The node ID.
+        """
+
+    def on_expand(self, node: int) -> None:
+        """
+        Called when a node is added to the visited list, the nodes shown by draw_visited.
+
+        :param node: The node ID.
+        """
+
+    def on_goal(self, path: list[int]) -> None:
+        """
+        Called when the search found a path to the goal.
+
+        :param path: The path from the start to the goal.
+        """
+
+    def on_finish(self, aborted: bool) -> None:
+        """
+        Called once the search is over.
+
+        :param aborted: Whether the search was stopped by SearchAborted.
+        """
+
+
+class SearchStats(SearchObserver):
+    """
+    Observer counting the operations of a search and timing its phases, with an optional budget.
+    """
+    def __init__(self, max_expansions: int | None = None, time_limit: float | None = None) -> None:
+        """
+        :param max_expansions: The number of visited nodes after which the search is aborted, if any.
+        :param time_limit: The number of seconds after which the search is aborted, if any.
+        """
+        self.max_expansions = max_expansions
+        self.time_limit = time_limit
+        self.expansions = 0
+        self.pushes = 0
+        self.pops = 0
+        self.decreases = 0
+        self.frontier_size = 0
+        self.max_frontier = 0
+        self.phase_times = {}
+        self.elapsed = 0.0
+        self.aborted = False
+        self.path_length = None
+        self._start_time = None
+        self._deadline = None
+        self._phase = None
+        self._phase_start = None
+
+    @property
+    def frontier_operations(self) -> int:
+        """
+        Gets the number of pushes, pops and priority decreases, the heap operations when the frontier is a heap.
+        """
+        return self.pushes + self.pops + self.decreases
+
+    def on_start(self, maze) -> None:
+        self._start_time = time.perf_counter()
+        if self.time_limit is not None:
+            self._deadline = self._start_time + self.time_limit
+        self.on_phase("search")
+
+    def on_phase(self, name: str) -> None:
+        now = time.perf_counter()
+        if self._phase is not None:
+            self.phase_times[self._phase] = self.phase_times.get(self._phase, 0.0) + now - self._phase_start
+        self._phase, self._phase_start = name, now
+
+    def on_push(self, node: int) -> None:
+        self.pushes += 1
+        self.frontier_size += 1
+        if self.frontier_size > self.max_frontier:
+            self.max_frontier = self.frontier_size
+
+    def on_pop(self, node: int) -> None:
+        self.pops += 1
+        self.frontier_size -= 1
+        self._check_limits()
+
+    def on_decrease(self, node: int) -> None:
+        self.decreases += 1
+
+    def on_expand(self, node: int) -> None:
+        self.expansions += 1
+        self._check_limits()
+
+    def on_goal(self, path: list[int]) -> None:
+        self.path_length = len(path)
+
+    def on_finish(self, aborted: bool) -> None:
+        self.on_phase(None)
+        self.phase_times.pop(None, None)
+        self.elapsed = time.perf_counter() - self._start_time
+        self.aborted = aborted
+
+    def _check_limits(self) -> None:
+        """
+        Aborts the search once it is over budget. Called on both pops and expansions, since some searches, such as
+        Depth-First Search down a long corridor, expand many nodes between two pops.
+        """
+        if self.max_expansions is not None and self.expansions > self.max_expansions:
+            raise SearchAborted(f'Search visited more than {self.max_expansions} nodes')
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise SearchAborted(f'Search took more than {self.time_limit} seconds')
+
+    def as_dict(self) -> dict:
+        """
+        Returns the statistics as a dictionary, ready to be serialized to JSON.
+        """
+        return {
+            "expansions": self.expansions,
+            "pushes": self.pushes,
+            "pops": self.pops,
+            "decreases": self.decreases,
+            "frontier_operations": self.frontier_operations,
+            "max_frontier": self.max_frontier,
+            "path_length": self.path_length,
+            "elapsed": self.elapsed,
+            "phase_times": dict(self.phase_times),
+            "aborted": self.aborted,
+        }
+
+
+class _ObservedVisitedList(list):
+    def __init__(self, observer: SearchObserver, nodes) -> None:
+        super().__init__()
+        self.observer = observer
+        for node in nodes:
+            self.append(node)
+
+    def append(self, node: int) -> None:
+        super().append(node)
+        self.observer.on_expand(node)
+
+
+class _ObservedQueue(deque):
+    def __init__(self, observer: SearchObserver, nodes) -> None:
+        super().__init__()
+        self.observer = observer
+        for node in nodes:
+            self.append(node)
+
+    def append(self, node: int) -> None:
+        super().append(node)
+        self.observer.on_push(node)
+
+    def popleft(self) -> int:
+        node = super().popleft()
+        self.observer.on_pop(node)
+        return node
+
+
+class _ObservedStack(list):
+    def __init__(self, observer: SearchObserver, nodes) -> None:
+        super().__init__()
+        self.observer = observer
+        for node in nodes:
+            self.append(node)
+
+    def append(self, node: int) -> None:
+        super().append(node)
+        self.observer.on_push(node)
+
+    def pop(self, index: int = -1) -> int:
+        node = super().pop(index)
+        self.observer.on_pop(node)
+        return node
+
+
+class _ObservedHeap(IndexedHeap):
+    def __init__(self, observer: SearchObserver) -> None:
+        super().__init__()
+        self.observer = observer
+
+    def push(self, node: int, priority) -> None:
+        super().push(node, priority)
+        self.observer.on_push(node)
+
+    def pop(self):
+        node, priority = super().pop()
+        self.observer.on_pop(node)
+        return node, priority
+
+    def decrease_key(self, node: int, priority) -> None:
+        super().decrease_key(node, priority)
+        self.observer.on_decrease(node)
+
+
+def visited_list(observer: SearchObserver | None, nodes=()) -> list[int]:
+    """
+    Creates the visited list of a search.
+
+    :param observer: The observer of the search, if any.
+    :param nodes: The nodes visited from the start.
+    :return: A plain list without observer, or a list calling on_expand otherwise.
+    """
+    if observer is None:
+        return list(nodes)
+    # Set before the first nodes are added, so that observers can tell which list they belong to
+    observer.visited_list = _ObservedVisitedList(observer, ())
+    for node in nodes:
+        observer.visited_list.append(node)
+    return observer.visited_list
+
+
+def queue(observer: SearchObserver | None, nodes=()) -> deque:
+    """
+    Creates a FIFO frontier, used through append and popleft.
+
+    :param observer: The observer of the search, if any.
+    :param nodes: The nodes initially in the frontier.
+    :return: A plain deque without observer, or a deque calling on_push and on_pop otherwise.
+    """
+    if observer is None:
+        return deque(nodes)
+    return _ObservedQueue(observer, nodes)
+
+
+def stack(observer: SearchObserver | None, nodes=()) -> list[int]:
+    """
+    Creates a LIFO frontier, used through append and pop.
+
+    :param observer: The observer of the search, if any.
+    :param nodes: The nodes initially in the frontier.
+    :return: A plain list without observer, or a list calling on_push and on_pop otherwise.
+    """
+    if observer is None:
+        return list(nodes)
+    return _ObservedStack(observer, nodes)
+
+
+def heap(observer: SearchObserver | None) -> IndexedHeap:
+    """
+    Creates a priority frontier.
+
+    :param observer: The observer of the search, if any.
+    :return: A plain IndexedHeap without observer, or one calling on_push, on_pop and on_decrease otherwise.
+    """
+    if observer is None:
+        return IndexedHeap()
+    return _ObservedHeap(observer)
+
+
+def observable(algorithm):
+    """
+    Decorates a search algorithm to accept an optional observer keyword argument.
+
+    Without an observer, the algorithm runs as is. With one, the observer is told when the search starts, finds the
+    goal and finishes, and a search aborted by SearchAborted returns the nodes visited so far and no path.
+    The algorithm must build its visited list with visited_list, and accept the observer as a keyword argument.
+    """
+    @functools.wraps(algorithm)
+    def search(maze, *args, observer: SearchObserver | None = None, **kwargs):
+        if observer is None:
+            return algorithm(maze, *args, **kwargs)
+        observer.visited_list = None
+        observer.on_start(maze)
+        try:
+            visited, path = algorithm(maze, *args, observer=observer, **kwargs)
+            aborted = False
+        except SearchAborted:
+            visited, path = observer.visited_list or [], None
+            aborted = True
+        # Plain lists, which no longer call the observer
+        visited = list(visited)
+        if path is not None:
+            path = list(path)
+            observer.on_goal(path)
+        observer.visited_list = None
+        observer.on_finish(aborted)
+        return visited, path
+    return search
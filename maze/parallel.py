@@ -0,0 +1,144 @@
+"""
+Level-synchronous Breadth-First Search over a pool of processes, for grids too large for a single core.
+
+The walls and the search state live in shared memory. The grid is split into bands of whole columns, which are
+contiguous in node ID order, and each worker owns one band: it is the only process writing the visited flags, parents
+and distances of its nodes. For each level, every worker receives the frontier nodes of its band and of the columns
+just outside it, so that it sees every parent candidate of the nodes it owns, and sends back the nodes it reached.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from . import compact
+from .compact import SearchResult, UNREACHED
+from .maze import Maze
+
+# Levels smaller than this are expanded by the calling process, sending them to the workers costing more
+PARALLEL_THRESHOLD = 1 << 16
+
+# Search state attached by the current worker process: the masks, visited flags, parents and distances
+_worker_arrays = None
+
+
+def _create_array(blocks: list, count: int, dtype, fill) -> np.ndarray:
+    """
+    Creates an array in a new shared memory block, appended to blocks.
+    """
+    block = shared_memory.SharedMemory(create=True, size=max(count * np.dtype(dtype).itemsize, 1))
+    blocks.append(block)
+    array = np.ndarray((count,), dtype=dtype, buffer=block.buf)
+    array[:] = fill
+    return array
+
+
+def _attach_arrays(block_names: list[str], count: int) -> None:
+    """
+    Attaches the search state in shared memory, once per worker process.
+    """
+    global _worker_arrays
+    # Workers share the resource tracker of the parent process, which unlinks the blocks once the search is done
+    blocks = [shared_memory.SharedMemory(name=name) for name in block_names]
+    _worker_arrays = blocks, [np.ndarray((count,), dtype=dtype, buffer=block.buf)
+                              for block, dtype in zip(blocks, (np.uint8, np.uint8, np.int32, np.int32))]
+
+
+def _expand_band(low: int, high: int, step: int, frontier: np.ndarray, positions: np.ndarray,
+                 level: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reaches the nodes of a band in the next level.
+
+    :param low: The first node ID of the band.
+    :param high: The node ID after the last one of the band.
+    :param step: The side length of the grid.
+    :param frontier: The nodes of the current level in the band and its neighbouring columns, in visit order.
+    :param positions: The index of each of these nodes in the whole level.
+    :param level: The distance of the next level from the start.
+    :return: The nodes reached, and their order keys in the whole level: parent position * 4 + direction.
+    """
+    masks, visited, parents, distances = _worker_arrays[1]
+    nodes, keys = compact.expand_level(masks, visited, frontier, step, low, high)
+    parents[nodes] = frontier[keys >> 2]
+    distances[nodes] = level
+    return nodes, positions[keys >> 2] * 4 + (keys & 3)
+
+
+def parallel_bfs(maze: Maze, workers: int | None = None, record_order: bool = True, start: int | None = None,
+                 goal: int | None = None) -> SearchResult:
+    """
+    Performs a level-synchronous Breadth-First Search, expanding the wide levels over a pool of processes.
+    Its result is the same as that of compact.level_bfs.
+
+    :param maze: The maze to search.
+    :param workers: The number of worker processes. Default is the number of CPUs.
+    :param record_order: Whether to record the visit order.
+    :param start: The node to start from. Default is the maze's starting point.
+    :param goal: The node to stop at. Default is the maze's goal. Pass -1 to explore every reachable node.
+    :return: The search result, whose arrays are copied out of shared memory.
+    """
+    start = maze.starting_point if start is None else start
+    goal = maze.goal if goal is None else goal
+    workers = workers or os.cpu_count() or 1
+    step = maze.grid_length
+    count = maze.adjacency_matrix_length
+    order = np.empty(count, dtype=np.int32) if record_order else None
+    # First node ID of each band, as whole columns
+    bounds = np.linspace(0, step, workers + 1).astype(np.int64) * step
+    blocks = []
+    try:
+        masks = _create_array(blocks, count, np.uint8, maze.walls.masks)
+        visited = _create_array(blocks, count, np.uint8, 0)
+        parents = _create_array(blocks, count, np.int32, UNREACHED)
+        distances = _create_array(blocks, count, np.int32, UNREACHED)
+        visited[start] = 1
+        parents[start] = start
+        distances[start] = 0
+        order_length = 0
+        if record_order:
+            order[0] = start
+            order_length = 1
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_arrays,
+                                 initargs=([block.name for block in blocks], count)) as executor:
+            frontier = np.array([start], dtype=np.int64)
+            level = 0
+            while len(frontier) and not (0 <= goal and visited[goal]):
+                level += 1
+                if len(frontier) < PARALLEL_THRESHOLD:
+                    frontier = compact.settle_level(masks, visited, parents, distances, frontier, level, step)
+                else:
+                    frontier = _parallel_level(executor, bounds, frontier, level, step)
+                if record_order:
+                    order[order_length:order_length + len(frontier)] = frontier
+                    order_length += len(frontier)
+        visited, parents, distances = visited.copy(), parents.copy(), distances.copy()
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    path = compact.retrace_path(parents, start, goal) if 0 <= goal and visited[goal] else None
+    return SearchResult(visited, parents, order, order_length, path, distances)
+
+
+def _parallel_level(executor: ProcessPoolExecutor, bounds: np.ndarray, frontier: np.ndarray, level: int,
+                    step: int) -> np.ndarray:
+    """
+    Expands a level over the workers, one band each.
+
+    :return: The next level, in visit order.
+    """
+    by_node = np.argsort(frontier, kind="stable")
+    sorted_frontier = frontier[by_node]
+    futures = []
+    for low, high in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        if low == high:
+            continue
+        # The band's frontier nodes and those one column away, which may be parents of the band's nodes
+        first, last = np.searchsorted(sorted_frontier, (low - step, high + step))
+        positions = np.sort(by_node[first:last])
+        futures.append(executor.submit(_expand_band, low, high, step, frontier[positions], positions, level))
+    results = [future.result() for future in futures]
+    nodes = np.concatenate([nodes for nodes, _ in results])
+    keys = np.concatenate([keys for _, keys in results])
+    return nodes[np.argsort(keys)]
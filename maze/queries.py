@@ -0,0 +1,392 @@
+import threading
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+
+from .grid import RIGHT, BOTTOM, WALL_BITS
+from .maze import Maze
+
+# Distance and parent of the nodes a source can't reach
+UNREACHABLE = -1
+
+
+class DistanceEngine:
+    """
+    Answers many start and goal queries on the same maze, without reading or changing its starting point and goal.
+
+    The first query from a source runs a full Breadth-First Search from it, and keeps the distance and parent of
+    every node as int32 arrays. Later queries from that source, or to it since moves are reversible, are answered
+    from these arrays in O(path length). The arrays of the least recently used sources are dropped when they take
+    more than the memory cap, and all of them are dropped when the walls change.
+
+    Like bfs, it counts moves and ignores cell costs. Queries can be made from several threads.
+    """
+    def __init__(self, maze: Maze, max_bytes: int = 256 * 2 ** 20) -> None:
+        """
+        :param maze: The maze to answer queries on.
+        :param max_bytes: The memory the cached arrays can use. The most recent one is always kept.
+        """
+        self.maze = maze
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # (distances, parents) by source, the least recently used first
+        self._trees = OrderedDict()
+        self._cached_bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+    def tree(self, source: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Gets the Breadth-First Search tree of a source, from the cache or by searching.
+
+        :param source: The source's node ID.
+        :return: A tuple of read-only int32 arrays indexed by node ID : the number of moves from the source, and the
+                 parent of each node on a shortest path from the source. Both are UNREACHABLE for the nodes the source
+                 can't reach, and the source is its own parent.
+        """
+        self.__check_node(source)
+        with self._lock:
+            self.__check_version()
+            tree = self._trees.get(source)
+            if tree is not None:
+                self._trees.move_to_end(source)
+                self.hits += 1
+                return tree
+            self.misses += 1
+            version = self._version
+        tree = self.__search(source)
+        with self._lock:
+            # Trees of walls changed during the search are returned, but not kept
+            if version == self._version == self.maze.walls.version:
+                self.__store(source, tree)
+        return tree
+
+    def distance(self, start: int, goal: int) -> int | None:
+        """
+        Gets the number of moves of a shortest path.
+
+        :param start: The start's node ID.
+        :param goal: The goal's node ID.
+        :return: The number of moves from start to goal, or None if the goal can't be reached.
+        """
+        source = self.__cached_source(start, goal)
+        distances, _ = self.tree(source)
+        distance = int(distances[goal if source == start else start])
+        return None if distance == UNREACHABLE else distance
+
+    def path(self, start: int, goal: int) -> list[int] | None:
+        """
+        Gets a shortest path.
+
+        :param start: The start's node ID.
+        :param goal: The goal's node ID.
+        :return: The path from start to goal, or None if the goal can't be reached.
+        """
+        source = self.__cached_source(start, goal)
+        _, parents = self.tree(source)
+        path = self.__retrace(parents, source, goal if source == start else start)
+        if path is not None and source != start:
+            path.reverse()
+        return path
+
+    def distances(self, queries) -> list[int | None]:
+        """
+        Answers many distance queries, searching at most once from each source.
+
+        :param queries: The (start, goal) pairs.
+        :return: The distance of each query, None for the unreachable goals.
+        """
+        results = [None] * len(queries)
+        for source, items in self.__group(queries).items():
+            distances, _ = self.tree(source)
+            targets = np.fromiter((target for _, target in items), dtype=np.int64, count=len(items))
+            for (index, _), distance in zip(items, distances[targets].tolist()):
+                results[index] = None if distance == UNREACHABLE else distance
+        return results
+
+    def paths(self, queries) -> list[list[int] | None]:
+        """
+        Answers many path queries, searching at most once from each source.
+
+        :param queries: The (start, goal) pairs.
+        :return: The path of each query, None for the unreachable goals.
+        """
+        results = [None] * len(queries)
+        for source, items in self.__group(queries).items():
+            _, parents = self.tree(source)
+            for index, target in items:
+                path = self.__retrace(parents, source, target)
+                if path is not None and queries[index][0] != source:
+                    path.reverse()
+                results[index] = path
+        return results
+
+    def clear(self) -> None:
+        """
+        Drops every cached tree.
+        """
+        with self._lock:
+            self._trees.clear()
+            self._cached_bytes = 0
+
+    def __group(self, queries) -> dict[int, list[tuple[int, int]]]:
+        """
+        Groups queries by the source to search from, reusing the cached trees of either end.
+
+        :param queries: The (start, goal) pairs.
+        :return: The (query index, other end) pairs of each source.
+        """
+        with self._lock:
+            self.__check_version()
+        groups = defaultdict(list)
+        for index, (start, goal) in enumerate(queries):
+            self.__check_node(start)
+            self.__check_node(goal)
+            if start in groups or self.__is_cached(start) or goal not in groups and not self.__is_cached(goal):
+                groups[start].append((index, goal))
+            else:
+                groups[goal].append((index, start))
+        return groups
+
+    def __cached_source(self, start: int, goal: int) -> int:
+        """
+        Picks the end of a query to search from : the goal if only its tree is cached, the start otherwise.
+        """
+        return goal if not self.__is_cached(start) and self.__is_cached(goal) else start
+
+    def __is_cached(self, node: int) -> bool:
+        return node in self._trees and self._version == self.maze.walls.version
+
+    def __check_node(self, node: int) -> None:
+        if not 0 <= node < self.maze.adjacency_matrix_length:
+            raise ValueError(f'Node {node} is not in the maze')
+
+    def __check_version(self) -> None:
+        """
+        Drops every cached tree if the walls changed since they were computed.
+        """
+        version = self.maze.walls.version
+        if version != self._version:
+            self._trees.clear()
+            self._cached_bytes = 0
+            self._version = version
+
+    def __store(self, source: int, tree: tuple[np.ndarray, np.ndarray]) -> None:
+        if source in self._trees:
+            return
+        self._trees[source] = tree
+        self._cached_bytes += tree[0].nbytes + tree[1].nbytes
+        while self._cached_bytes > self.max_bytes and len(self._trees) > 1:
+            _, (distances, parents) = self._trees.popitem(last=False)
+            self._cached_bytes -= distances.nbytes + parents.nbytes
+
+    def __search(self, source: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Runs a Breadth-First Search over the whole reachable part of the maze.
+
+        :param source: The source's node ID.
+        :return: The read-only distance and parent arrays.
+        """
+        masks, moves = self.maze.neighbour_index.masks, self.maze.neighbour_index.moves
+        count = self.maze.adjacency_matrix_length
+        # Lists are faster to fill one item at a time than arrays
+        distances = [UNREACHABLE] * count
+        parents = [UNREACHABLE] * count
+        distances[source] = 0
+        parents[source] = source
+        level = [source]
+        depth = 0
+        while level:
+            depth += 1
+            next_level = []
+            for current in level:
+                for move in moves[masks[current]]:
+                    n = current + move
+                    if parents[n] == UNREACHABLE:
+                        parents[n] = current
+                        distances[n] = depth
+                        next_level.append(n)
+            level = next_level
+        distances = np.array(distances, dtype=np.int32)
+        parents = np.array(parents, dtype=np.int32)
+        distances.flags.writeable = False
+        parents.flags.writeable = False
+        return distances, parents
+
+    @staticmethod
+    def __retrace(parents: np.ndarray, source: int, target: int) -> list[int] | None:
+        """
+        Retraces the path from source to target in a search tree.
+
+        :return: The path, or None if the target wasn't reached.
+        """
+        if parents[target] == UNREACHABLE:
+            return None
+        # Indexing a memoryview gives Python ints, much faster than indexing the array
+        parents = memoryview(parents)
+        path = [target]
+        current = target
+        while current != source:
+            current = parents[current]
+            path.append(current)
+        path.reverse()
+        return path
+
+
+class TreeIndex:
+    """
+    Answers path queries on perfect mazes, whose passages form a tree, without any search.
+
+    The tree is rooted at node 0, and binary lifting tables give the lowest common ancestor of two nodes in
+    O(log n), hence their distance. Paths are retraced through the ancestor in O(path length).
+
+    The index is rebuilt when the walls change, after checking that they still form a tree. Obstacles, cleared walls
+    and other loops or separated parts break this property, in which case queries are answered by a DistanceEngine.
+    """
+    def __init__(self, maze: Maze, fallback: DistanceEngine | None = None) -> None:
+        """
+        :param maze: The maze to answer queries on.
+        :param fallback: The engine answering queries when the walls don't form a tree. A new one by default.
+        """
+        self.maze = maze
+        self.fallback = fallback if fallback is not None else DistanceEngine(maze)
+        self._version = None
+        self._is_tree = False
+        self._parents = None
+        self._depths = None
+        # Ancestors 1, 2, 4, ... levels above each node, the root being its own ancestor
+        self._ancestors = []
+        self._lock = threading.Lock()
+
+    @property
+    def is_tree(self) -> bool:
+        """
+        Gets whether the walls currently form a tree, so that queries don't need any search.
+        """
+        return self.__update()
+
+    def distance(self, start: int, goal: int) -> int | None:
+        """
+        Gets the number of moves of the shortest path.
+
+        :param start: The start's node ID.
+        :param goal: The goal's node ID.
+        :return: The number of moves from start to goal, or None if the goal can't be reached.
+        """
+        if not self.__update():
+            return self.fallback.distance(start, goal)
+        self.__check_node(start)
+        self.__check_node(goal)
+        depths = self._depths
+        return depths[start] + depths[goal] - 2 * depths[self.__common_ancestor(start, goal)]
+
+    def path(self, start: int, goal: int) -> list[int] | None:
+        """
+        Gets the shortest path.
+
+        :param start: The start's node ID.
+        :param goal: The goal's node ID.
+        :return: The path from start to goal, or None if the goal can't be reached.
+        """
+        if not self.__update():
+            return self.fallback.path(start, goal)
+        self.__check_node(start)
+        self.__check_node(goal)
+        ancestor = self.__common_ancestor(start, goal)
+        parents = self._parents
+        path = [start]
+        while path[-1] != ancestor:
+            path.append(parents[path[-1]])
+        backward_path = [goal]
+        while backward_path[-1] != ancestor:
+            backward_path.append(parents[backward_path[-1]])
+        path.extend(reversed(backward_path[:-1]))
+        return path
+
+    def __check_node(self, node: int) -> None:
+        if not 0 <= node < self.maze.adjacency_matrix_length:
+            raise ValueError(f'Node {node} is not in the maze')
+
+    def __common_ancestor(self, a: int, b: int) -> int:
+        """
+        Finds the lowest common ancestor of two nodes by binary lifting.
+        """
+        depths = self._depths
+        ancestors = self._ancestors
+        if depths[a] < depths[b]:
+            a, b = b, a
+        difference = depths[a] - depths[b]
+        level = 0
+        while difference:
+            if difference & 1:
+                a = ancestors[level][a]
+            difference >>= 1
+            level += 1
+        if a == b:
+            return a
+        for level in reversed(range(len(ancestors))):
+            if ancestors[level][a] != ancestors[level][b]:
+                a, b = ancestors[level][a], ancestors[level][b]
+        return self._parents[a]
+
+    def __update(self) -> bool:
+        """
+        Rebuilds the index if the walls changed.
+
+        :return: Whether the walls form a tree.
+        """
+        walls = self.maze.walls
+        with self._lock:
+            if self._version != walls.version:
+                version = walls.version
+                self._is_tree = self.__build(walls.masks)
+                self._version = version
+            return self._is_tree
+
+    def __build(self, masks: np.ndarray) -> bool:
+        """
+        Roots the tree formed by the walls and builds its binary lifting tables.
+
+        :param masks: The wall masks of every cell.
+        :return: False, without building anything, if the walls don't form a tree.
+        """
+        self._parents = self._depths = None
+        self._ancestors = []
+        count = len(masks)
+        # Each passage opens the right or bottom wall of exactly one cell. A tree has one passage less than cells.
+        passages = np.count_nonzero(masks & WALL_BITS[RIGHT] == 0) + np.count_nonzero(masks & WALL_BITS[BOTTOM] == 0)
+        if passages != count - 1:
+            return False
+        masks, moves = self.maze.neighbour_index.masks, self.maze.neighbour_index.moves
+        parents = [UNREACHABLE] * count
+        depths = [0] * count
+        parents[0] = 0
+        level = [0]
+        reached = 1
+        depth = 0
+        while level:
+            depth += 1
+            next_level = []
+            for current in level:
+                for move in moves[masks[current]]:
+                    n = current + move
+                    if parents[n] == UNREACHABLE:
+                        parents[n] = current
+                        depths[n] = depth
+                        next_level.append(n)
+            reached += len(next_level)
+            level = next_level
+        # With one passage less than cells, being connected means having no loop
+        if reached != count:
+            return False
+        ancestors = np.array(parents, dtype=np.int32)
+        tables = [ancestors]
+        for _ in range(1, max(depths).bit_length()):
+            ancestors = ancestors[ancestors]
+            tables.append(ancestors)
+        # Indexing memoryviews gives Python ints, much faster than indexing the arrays
+        self._ancestors = [memoryview(table) for table in tables]
+        self._parents = self._ancestors[0]
+        self._depths = memoryview(np.array(depths, dtype=np.int32))
+        return True
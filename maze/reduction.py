@@ -0,0 +1,234 @@
+"""
+Shrinks a maze before searching it, by filling its dead ends and compressing its corridors into single edges.
+
+A cell other than the start and the goal with a single open neighbour can't be on a path between them, and nor can
+the cells only leading to it: dead-end filling removes them one layer at a time, until every cell left has at least
+two open neighbours. The remaining cells with exactly two of them are corridors, which a search goes through without
+any choice to make. ReducedMaze keeps only the junctions, linked by one weighted edge per corridor, and can be searched
+by the algorithms of maze.search like a maze. On perfect mazes, only the path between the start and the goal is left.
+"""
+import numpy as np
+
+from .compact import VECTOR_THRESHOLD
+from .grid import WALL_BITS
+from .maze import Maze
+
+# Number of open sides of a cell, by wall mask
+_OPEN_SIDES = np.array([4 - bin(mask).count("1") for mask in range(16)], dtype=np.int32)
+_WALL_BITS = np.array(WALL_BITS, dtype=np.uint8)
+
+
+def fill_dead_ends(maze: Maze, keep: tuple[int, ...] | None = None) -> np.ndarray:
+    """
+    Fills the dead ends of a maze, without changing it.
+
+    :param maze: The maze to fill.
+    :param keep: The cells never filled. Default is the maze's starting point and goal.
+    :return: A boolean array indexed by node ID, True for the filled cells.
+    """
+    if keep is None:
+        keep = (maze.starting_point, maze.goal)
+    filled, _ = _fill(maze, keep)
+    return np.array(filled, dtype=bool)
+
+
+def _fill(maze: Maze, keep: tuple[int, ...]) -> tuple[list[bool], list[int]]:
+    """
+    Fills the dead ends of a maze, a whole layer at a time with NumPy while there are many of them.
+
+    :return: A tuple of lists indexed by node ID: whether each cell was filled, and the number of open neighbours
+             left to each cell that wasn't.
+    """
+    masks = maze.walls.masks
+    offsets = np.array(maze.walls.offsets, dtype=np.int64)
+    degrees = _OPEN_SIDES[masks]
+    filled = np.zeros(maze.adjacency_matrix_length, dtype=bool)
+    kept = np.zeros(maze.adjacency_matrix_length, dtype=bool)
+    kept[list(keep)] = True
+    leaves = np.flatnonzero((degrees <= 1) & ~kept)
+    while len(leaves) >= VECTOR_THRESHOLD:
+        filled[leaves] = True
+        cells, directions = np.nonzero((masks[leaves, None] & _WALL_BITS) == 0)
+        neighbours = leaves[cells] + offsets[directions]
+        neighbours = neighbours[~filled[neighbours]]
+        np.subtract.at(degrees, neighbours, 1)
+        neighbours = np.unique(neighbours)
+        leaves = neighbours[(degrees[neighbours] <= 1) & ~kept[neighbours]]
+
+    # The few dead ends left are mostly long branches, filled one cell at a time
+    filled = filled.tolist()
+    degrees = degrees.tolist()
+    kept = kept.tolist()
+    masks, moves = maze.neighbour_index.masks, maze.neighbour_index.moves
+    leaves = leaves.tolist()
+    while leaves:
+        leaf = leaves.pop()
+        filled[leaf] = True
+        for move in moves[masks[leaf]]:
+            n = leaf + move
+            if filled[n]:
+                continue
+            degrees[n] -= 1
+            if degrees[n] == 1 and not kept[n]:
+                leaves.append(n)
+    return filled, degrees
+
+
+class _JunctionIndex:
+    """
+    Neighbours of the junctions of a ReducedMaze, in the shape of Maze.neighbour_index that the search algorithms use:
+    the neighbours of ``node`` are ``node + move`` for each ``move`` in ``moves[masks[node]]``. Junctions have no wall
+    mask, so each one is its own key.
+    """
+    def __init__(self, edges: dict[int, dict[int, float]]) -> None:
+        """
+        :param edges: The neighbour junctions of each junction.
+        """
+        self.masks = {node: node for node in edges}
+        self.moves = {node: tuple(n - node for n in targets) for node, targets in edges.items()}
+
+    def neighbours(self, node: int) -> tuple[int, ...]:
+        """
+        Returns the neighbour junctions of a junction.
+
+        :param node: The junction's node ID.
+        :return: The neighbour node IDs.
+        """
+        return tuple(node + move for move in self.moves[node])
+
+
+class ReducedMaze:
+    """
+    The junctions of a maze after dead-end filling, linked by an edge for each corridor between two of them.
+
+    It has the attributes the algorithms of maze.search read from a maze, and junctions keep the node IDs of their
+    cells, so the heuristics still apply. An edge costs the cells its corridor enters, its length in moves when the
+    maze has no cell costs, and the cost-aware algorithms (Uniform Cost Search, A* and its variants) read these costs
+    from edge_costs. Breadth-First and Depth-First searches count edges instead: their paths are still valid, but may
+    not be the shortest ones when more than one corridor is left. Jump Point Search falls back to A*.
+
+    It is a snapshot of the maze, its starting point and its goal: changes made to the maze afterwards are ignored.
+    """
+    node_costs = None
+
+    def __init__(self, maze: Maze, fill: bool = True) -> None:
+        """
+        Fills the dead ends of the maze and compresses its corridors.
+
+        :param maze: The maze to reduce.
+        :param fill: Whether to fill the dead ends. Without it, only the corridors are compressed.
+        """
+        self.maze = maze
+        self.grid_length = maze.grid_length
+        self.adjacency_matrix_length = maze.adjacency_matrix_length
+        self.starting_point = maze.starting_point
+        self.goal = maze.goal
+        ends = (self.starting_point, self.goal)
+        if fill:
+            self._filled, degrees = _fill(maze, ends)
+        else:
+            self._filled = [False] * maze.adjacency_matrix_length
+            degrees = _OPEN_SIDES[maze.walls.masks].tolist()
+        # Cost of moving between two junctions, and the first cell of the cheapest corridor between them
+        self.edge_costs = {}
+        self._first_steps = {}
+        self.__link_junctions(degrees)
+        self._index = _JunctionIndex(self.edge_costs)
+
+    @property
+    def neighbour_index(self) -> _JunctionIndex:
+        """
+        Gets the neighbour junctions of each junction.
+        """
+        return self._index
+
+    @property
+    def junction_count(self) -> int:
+        """
+        Gets the number of junctions, the nodes the searches go through.
+        """
+        return len(self.edge_costs)
+
+    @property
+    def filled_count(self) -> int:
+        """
+        Gets the number of cells removed by dead-end filling.
+        """
+        return sum(self._filled)
+
+    def __link_junctions(self, degrees: list[int]) -> None:
+        """
+        Walks the corridors leaving each junction, keeping the cheapest one to each other junction.
+        """
+        filled = self._filled
+        masks, moves = self.maze.neighbour_index.masks, self.maze.neighbour_index.moves
+        node_costs = None if self.maze.node_costs is None else self.maze.node_costs.tolist()
+        junctions = np.flatnonzero(~np.array(filled) & (np.array(degrees) != 2)).tolist()
+        junctions = set(junctions).union((self.starting_point, self.goal))
+        for junction in junctions:
+            edges = self.edge_costs[junction] = {}
+            first_steps = self._first_steps[junction] = {}
+            for move in moves[masks[junction]]:
+                first = junction + move
+                if filled[first]:
+                    continue
+                previous, node, cost = junction, first, 0
+                while node not in junctions:
+                    cost += 1 if node_costs is None else node_costs[node]
+                    # Corridor cells have two neighbours left, the one the walk came from and the next one
+                    for move in moves[masks[node]]:
+                        n = node + move
+                        if n != previous and not filled[n]:
+                            previous, node = node, n
+                            break
+                cost += 1 if node_costs is None else node_costs[node]
+                # Corridors looping back to their junction never shorten a path
+                if node != junction and (node not in edges or cost < edges[node]):
+                    edges[node] = cost
+                    first_steps[node] = first
+
+    def expand_path(self, path: list[int]) -> list[int]:
+        """
+        Expands a path between junctions into the cells of the corridors it goes through.
+
+        :param path: Junctions, each linked to the previous one by an edge.
+        :return: The path of adjacent cells, as returned by a search of the maze.
+        """
+        filled = self._filled
+        masks, moves = self.maze.neighbour_index.masks, self.maze.neighbour_index.moves
+        cells = path[:1]
+        for junction, target in zip(path, path[1:]):
+            previous, node = junction, self._first_steps[junction][target]
+            while node != target:
+                cells.append(node)
+                for move in moves[masks[node]]:
+                    n = node + move
+                    if n != previous and not filled[n]:
+                        previous, node = node, n
+                        break
+            cells.append(target)
+        return cells
+
+    def solve(self, algorithm, observer=None) -> tuple[list[int], list[int] | None]:
+        """
+        Searches the junction graph, then expands the path found into cells.
+
+        :param algorithm: A search function (maze, observer=None), such as the values of search.ALGORITHMS.
+        :param observer: An observer of the search, see maze.observers. It sees junctions only.
+        :return: A tuple containing the list of visited junctions and the path of cells from the start to the goal,
+                 if found.
+        """
+        visited, path = algorithm(self, observer=observer)
+        return visited, None if path is None else self.expand_path(path)
+
+
+def reduced(algorithm):
+    """
+    Wraps a search function so that it searches the reduced maze instead.
+
+    :param algorithm: A search function (maze, observer=None), such as the values of search.ALGORITHMS.
+    :return: A search function (maze, observer=None) reducing the maze before each search.
+    """
+    def search(maze: Maze, observer=None) -> tuple[list[int], list[int] | None]:
+        return ReducedMaze(maze).solve(algorithm, observer)
+    return search
@@ -0,0 +1,182 @@
+import numpy as np
+import OpenGL.GL as gl
+import pygame
+
+from config.constants import COLORS
+from .grid import TOP, RIGHT, BOTTOM, LEFT, WALL_BITS
+from .maze import Maze
+
+LINE_THICKNESS = 3.0
+
+
+class MazeRenderer:
+    """
+    Draws a maze with vertex buffers, in a few OpenGL calls per frame whatever its size.
+
+    The wall lines are computed with NumPy and uploaded once to a vertex buffer, then only rebuilt when the walls or
+    the window size change. Cell overlays, such as the visited nodes or the path, are drawn as one batch of quads.
+    Only the fixed-function pipeline of OpenGL 1.5 is used, so it also runs on software rasterizers such as Mesa's.
+    """
+    def __init__(self, maze: Maze) -> None:
+        """
+        :param maze: The maze to draw. Buffers are only created on the first draw, once an OpenGL context exists.
+        """
+        self.maze = maze
+        self._wall_buffer = None
+        self._wall_vertex_count = 0
+        # Walls version and window size the wall buffer was built for
+        self._wall_state = None
+        self._overlay_buffer = None
+
+    def draw(self) -> None:
+        """
+        Draws the starting point, the goal and the walls.
+        """
+        maze = self.maze
+        self.draw_cells([maze.starting_point], COLORS["STARTING_NODE"])
+        self.draw_cells([maze.goal], COLORS["GOAL_NODE"])
+        screen_size = pygame.display.get_window_size()
+        state = maze.walls.version, screen_size
+        if self._wall_buffer is None:
+            self._wall_buffer = gl.glGenBuffers(1)
+        if state != self._wall_state:
+            vertices = self.wall_vertices(screen_size)
+            gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self._wall_buffer)
+            gl.glBufferData(gl.GL_ARRAY_BUFFER, vertices.nbytes, vertices, gl.GL_STATIC_DRAW)
+            self._wall_vertex_count = len(vertices)
+            self._wall_state = state
+        gl.glLineWidth(LINE_THICKNESS)
+        gl.glColor3f(*COLORS["WALL_COLOR"])
+        self.__draw_buffer(self._wall_buffer, gl.GL_LINES, self._wall_vertex_count)
+
+    def draw_cells(self, cells, color: tuple[float, float, float]) -> None:
+        """
+        Fills cells with a color, in a single draw call.
+
+        :param cells: The node IDs of the cells.
+        :param color: The RGB color.
+        """
+        cells = np.fromiter(cells, dtype=np.int64)
+        if len(cells) == 0:
+            return
+        vertices = self.cell_vertices(cells, pygame.display.get_window_size())
+        if self._overlay_buffer is None:
+            self._overlay_buffer = gl.glGenBuffers(1)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self._overlay_buffer)
+        gl.glBufferData(gl.GL_ARRAY_BUFFER, vertices.nbytes, vertices, gl.GL_STREAM_DRAW)
+        gl.glColor3f(*color)
+        self.__draw_buffer(self._overlay_buffer, gl.GL_QUADS, len(vertices))
+
+    def wall_vertices(self, screen_size: tuple[int, int]) -> np.ndarray:
+        """
+        Computes the wall lines in OpenGL coordinates.
+        Walls are stored on both of their sides, so only the top and left walls of each cell are drawn, along
+        with the right and bottom borders.
+
+        :param screen_size: The width and height of the window.
+        :return: A float32 array of shape (2 * lines, 2), each pair of rows being the ends of a line.
+        """
+        maze = self.maze
+        n = maze.grid_length
+        masks = maze.walls.masks
+        x, y = np.divmod(np.arange(maze.adjacency_matrix_length), n)
+        segments = []
+        # Cells with a wall in each direction, and the offsets of the line ends from the cell's top left corner
+        for direction, start, end, cells in (
+                (TOP, (0, 0), (1, 0), None),
+                (LEFT, (0, 0), (0, 1), None),
+                (RIGHT, (1, 0), (1, 1), x == n - 1),
+                (BOTTOM, (0, 1), (1, 1), y == n - 1)):
+            walled = (masks & WALL_BITS[direction]) != 0
+            if cells is not None:
+                walled &= cells
+            line_x, line_y = x[walled], y[walled]
+            ends = np.empty((len(line_x), 2, 2))
+            ends[:, 0, 0] = line_x + start[0]
+            ends[:, 0, 1] = line_y + start[1]
+            ends[:, 1, 0] = line_x + end[0]
+            ends[:, 1, 1] = line_y + end[1]
+            segments.append(ends.reshape(-1, 2))
+        return self.__to_gl_coordinates(np.concatenate(segments), screen_size)
+
+    def cell_vertices(self, cells: np.ndarray, screen_size: tuple[int, int]) -> np.ndarray:
+        """
+        Computes the corners of cells in OpenGL coordinates.
+
+        :param cells: The node IDs of the cells.
+        :param screen_size: The width and height of the window.
+        :return: A float32 array of shape (4 * cells, 2), the corners of each cell in clockwise order.
+        """
+        x, y = np.divmod(cells, self.maze.grid_length)
+        corners = np.empty((len(cells), 4, 2))
+        for i, (dx, dy) in enumerate(((0, 0), (1, 0), (1, 1), (0, 1))):
+            corners[:, i, 0] = x + dx
+            corners[:, i, 1] = y + dy
+        return self.__to_gl_coordinates(corners.reshape(-1, 2), screen_size)
+
+    def __to_gl_coordinates(self, points: np.ndarray, screen_size: tuple[int, int]) -> np.ndarray:
+        """
+        Converts grid coordinates, in cells, to OpenGL coordinates, like utils.coords_to_glcoords.
+        """
+        screen_width, screen_height = screen_size
+        cell_size = screen_width / self.maze.grid_length
+        center_x, center_y = screen_width // 2, screen_height // 2
+        result = np.empty(points.shape, dtype=np.float32)
+        result[:, 0] = (points[:, 0] * cell_size - center_x) / center_x
+        result[:, 1] = (center_y - points[:, 1] * cell_size) / center_y
+        return result
+
+    @staticmethod
+    def __draw_buffer(buffer, mode: int, count: int) -> None:
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, buffer)
+        gl.glEnableClientState(gl.GL_VERTEX_ARRAY)
+        gl.glVertexPointer(2, gl.GL_FLOAT, 0, None)
+        gl.glDrawArrays(mode, 0, count)
+        gl.glDisableClientState(gl.GL_VERTEX_ARRAY)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
+
+
+def draw_cells(maze: Maze, cells, color: tuple[float, float, float]):
+    """
+    Fills cells with a color, without updating the display.
+
+    :param maze: The maze being drawn.
+    :param cells: The node IDs of the cells.
+    :param color: The RGB color.
+    """
+    maze.renderer.draw_cells(cells, color)
+
+
+def fill_cells(maze: Maze, cells: set[int] | list[int], color: tuple[float, float, float], delay=16):
+    if isinstance(cells, list):
+        # Lists are animated one cell at a time
+        for node in cells:
+            draw_cells(maze, (node,), color)
+            maze.draw()
+            pygame.display.flip()
+            pygame.time.delay(delay)
+    else:
+        draw_cells(maze, cells, color)
+    maze.draw()
+    pygame.time.wait(delay)
+    pygame.display.flip()
+
+
+def draw_path(maze: Maze, path: list[int]):
+    """
+    Draws the path in the maze.
+
+    :param maze: The maze being drawn.
+    :param path: The list of nodes representing the path.
+    """
+    fill_cells(maze, path, COLORS["PATH_NODE"], 0)
+    pygame.time.wait(2000)
+
+
+def draw_visited(maze: Maze, visited: set[int] | list[int]):
+    """
+    Draws the visited nodes in the maze.
+    :param maze: The maze being drawn.
+    :param visited: The set or list of visited nodes.
+    """
+    fill_cells(maze, visited, COLORS["VISITED_NODE"])
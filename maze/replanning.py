@@ -0,0 +1,225 @@
+from .frontier import IndexedHeap
+from .heuristics import manhattan
+from .maze import Maze
+
+INFINITY = float("inf")
+
+
+class DStarLite:
+    """
+    Incremental shortest path planner, using D* Lite.
+
+    The planner searches backward from the goal, so that its results stay valid when the start moves, as it does for
+    an agent following the path. When walls change, only the nodes whose distance to the goal changed are expanded
+    again on the next call to replan, instead of searching from scratch.
+
+    Wall changes are received from the maze's walls. Changes of the cell costs aren't notified, and must be reported
+    with invalidate. Like A*, the heuristic assumes each move costs at least 1.
+    """
+    def __init__(self, maze: Maze, start: int | None = None, goal: int | None = None, heuristic=manhattan) -> None:
+        """
+        Creates the planner and subscribes to the changes of the maze's walls. No search happens before replan.
+
+        :param maze: The maze to plan in.
+        :param start: The start's node ID. Default is the maze's starting point.
+        :param goal: The goal's node ID. Default is the maze's goal.
+        :param heuristic: A consistent function (maze, node, goal) estimating the cost between two nodes.
+        """
+        self.maze = maze
+        self.heuristic = heuristic
+        self._start = maze.starting_point if start is None else start
+        self._goal = maze.goal if goal is None else goal
+        # Number of nodes expanded by the last replan
+        self.expansions = 0
+        self._path = None
+        self._costs = {}
+        self._lookaheads = {}
+        # Nodes whose neighbours or cost changed since the last replan, or None when everything has to be redone
+        self._changed = None
+        self._walls = maze.walls
+        self._walls.subscribe(self.invalidate)
+
+    @property
+    def start(self) -> int:
+        """
+        Gets the start of the planned path.
+        """
+        return self._start
+
+    @start.setter
+    def start(self, node: int) -> None:
+        """
+        Moves the start. The next replan reuses the previous search.
+
+        :param node: The new start's node ID.
+        """
+        if node != self._start:
+            self._start = node
+            self._path = None
+
+    @property
+    def goal(self) -> int:
+        """
+        Gets the goal of the planned path.
+        """
+        return self._goal
+
+    @goal.setter
+    def goal(self, node: int) -> None:
+        """
+        Moves the goal. The search is rooted at the goal, so the next replan starts from scratch.
+
+        :param node: The new goal's node ID.
+        """
+        if node != self._goal:
+            self._goal = node
+            self._changed = None
+            self._path = None
+
+    def invalidate(self, nodes: list[int] | None = None) -> None:
+        """
+        Reports cells whose walls or cost changed. Wall changes are reported automatically.
+
+        :param nodes: The node IDs of the cells, or None if the whole maze changed.
+        """
+        self._path = None
+        if nodes is None or self._changed is None:
+            self._changed = None
+        else:
+            self._changed.update(nodes)
+
+    def close(self) -> None:
+        """
+        Stops following the changes of the maze's walls.
+        """
+        self._walls.unsubscribe(self.invalidate)
+
+    def replan(self) -> list[int] | None:
+        """
+        Updates the shortest path after the changes reported since the last call.
+
+        :return: The path from the start to the goal, or None if the goal can't be reached.
+        """
+        if self._path is not None:
+            self.expansions = 0
+            return self._path
+        if self._changed is None:
+            self.__reset()
+        else:
+            # Keys computed from older starts are lowered by at least the distance the start moved
+            self._key_modifier += self.heuristic(self.maze, self._last_start, self._start)
+            self._last_start = self._start
+            # The cost of a cell is paid when entering it, so it changes the lookahead of its neighbours
+            neighbours = self.maze.neighbour_index.neighbours
+            changed = set(self._changed)
+            for node in self._changed:
+                changed.update(neighbours(node))
+            for node in changed:
+                self.__update_node(node)
+            self._changed.clear()
+        self.expansions = self.__compute_shortest_path()
+        self._path = self.__extract_path()
+        return self._path
+
+    def distance(self) -> float | None:
+        """
+        Gets the cost of the path found by the last replan.
+
+        :return: The cost from the start to the goal, or None if the goal can't be reached.
+        """
+        # The search stops once the start's lookahead is final, possibly before expanding it
+        cost = self._lookaheads.get(self._start, INFINITY)
+        return None if cost == INFINITY else cost
+
+    def __reset(self) -> None:
+        # Cost to the goal of the expanded nodes, and its one step lookahead for every node reached
+        self._costs = {}
+        self._lookaheads = {self._goal: 0}
+        self._key_modifier = 0
+        self._last_start = self._start
+        self._frontier = IndexedHeap()
+        self._frontier.push(self._goal, self.__key(self._goal))
+        self._changed = set()
+
+    def __key(self, node: int) -> tuple[float, float]:
+        cost = min(self._costs.get(node, INFINITY), self._lookaheads.get(node, INFINITY))
+        return cost + self.heuristic(self.maze, node, self._start) + self._key_modifier, cost
+
+    def __update_node(self, node: int) -> None:
+        """
+        Recomputes the lookahead of a node from its neighbours, and puts it in the frontier if it is inconsistent.
+        """
+        costs = self._costs
+        if node != self._goal:
+            node_costs = self.maze.node_costs
+            lookahead = INFINITY
+            for n in self.maze.neighbour_index.neighbours(node):
+                # Moving from node into n costs the cost of n
+                cost = costs.get(n, INFINITY) + (1 if node_costs is None else node_costs[n])
+                if cost < lookahead:
+                    lookahead = cost
+            self._lookaheads[node] = lookahead
+        frontier = self._frontier
+        if node in frontier:
+            frontier.remove(node)
+        if costs.get(node, INFINITY) != self._lookaheads.get(node, INFINITY):
+            frontier.push(node, self.__key(node))
+
+    def __compute_shortest_path(self) -> int:
+        """
+        Expands inconsistent nodes until the start's cost is known.
+
+        :return: The number of expanded nodes.
+        """
+        frontier = self._frontier
+        costs = self._costs
+        lookaheads = self._lookaheads
+        neighbours = self.maze.neighbour_index.neighbours
+        start = self._start
+        expansions = 0
+        while frontier:
+            node, key = frontier.peek()
+            start_cost = costs.get(start, INFINITY)
+            start_lookahead = lookaheads.get(start, INFINITY)
+            if key >= self.__key(start) and start_lookahead <= start_cost:
+                break
+            expansions += 1
+            new_key = self.__key(node)
+            if key < new_key:
+                frontier.update(node, new_key)
+                continue
+            frontier.pop()
+            lookahead = lookaheads.get(node, INFINITY)
+            if costs.get(node, INFINITY) > lookahead:
+                costs[node] = lookahead
+                for n in neighbours(node):
+                    self.__update_node(n)
+            else:
+                costs[node] = INFINITY
+                self.__update_node(node)
+                for n in neighbours(node):
+                    self.__update_node(n)
+        return expansions
+
+    def __extract_path(self) -> list[int] | None:
+        """
+        Follows the cheapest neighbours from the start to the goal.
+        """
+        if self.distance() is None:
+            return None
+        costs = self._costs
+        neighbours = self.maze.neighbour_index.neighbours
+        node_costs = self.maze.node_costs
+        path = [self._start]
+        node = self._start
+        while node != self._goal:
+            best, best_cost = None, INFINITY
+            for n in neighbours(node):
+                cost = costs.get(n, INFINITY) + (1 if node_costs is None else node_costs[n])
+                if cost < best_cost:
+                    best, best_cost = n, cost
+            if best is None:
+                return None
+            node = best
+            path.append(node)
+        return path
@@ -1,223 +1,628 @@
-from queue import PriorityQueue
-
 from maze import Maze
 from collections import deque
-import OpenGL.GL as gl
-from utils import coords_to_glcoords
-from config.constants import COLORS
-import pygame
-
-def bfs(maze: Maze) -> tuple[list[int], list[int] | None]:
+from maze import observers
+from maze.frontier import IndexedHeap
+from maze.neighbours import NeighbourIndex
+from maze.grid import TOP, RIGHT, BOTTOM, LEFT, WALL_BITS
+from maze.heuristics import HEURISTICS, manhattan
+from maze.observers import SearchObserver, observable
+
+@observable
+def bfs(maze: Maze, observer: SearchObserver | None = None) -> tuple[list[int], list[int] | None]:
     """
     Performs Breadth-First Search (BFS) on the maze.
 
     :param maze: The maze to search.
+    :param observer: An observer of the search, see maze.observers.
     :return: A tuple containing the list of visited nodes and the path from the start to the goal, if found.
     """
     starting_cell = maze.starting_point
     destination_cell = maze.goal
-    queue = deque()
-    queue.append(starting_cell)
+    queue = observers.queue(observer, [starting_cell])
     visited = {starting_cell}
-    visited_list = [starting_cell]
+    visited_list = observers.visited_list(observer, [starting_cell])
     parents = {}
+    masks, moves = maze.neighbour_index.masks, maze.neighbour_index.moves
     while queue:
         current = queue.popleft()
         if current == destination_cell:
             break
 
-        neighbours = maze.get_visitable_neighbours(current)
-        unvisited_neighbours = [x for x in neighbours if x not in visited]
-        for n in unvisited_neighbours:
-            visited.add(n)
-            visited_list.append(n)
-            parents[n] = current
-            queue.append(n)
+        for move in moves[masks[current]]:
+            n = current + move
+            if n not in visited:
+                visited.add(n)
+                visited_list.append(n)
+                parents[n] = current
+                queue.append(n)
     else:
         return visited_list, None
-    path = __retrace_path(maze, parents)
+    path = retrace_path(maze, parents)
     return visited_list, path
 
 
+@observable
 def dfs(maze: Maze, node: int | None = None,
-        destination: int  | None= None,
-        visited: set[int] | None= None,
-        visited_list: int | None= None,
-        parents: dict[int,int] | None=None,
-        max_depth: int | None = None) -> tuple[list[int] ,list[int] | None]:
+        destination: int | None = None,
+        max_depth: int | None = None,
+        observer: SearchObserver | None = None) -> tuple[list[int], list[int] | None]:
     """
     Performs Depth-First Search (DFS) on the maze.
+    It uses an explicit stack, so long corridors can't exceed the recursion limit.
 
     :param maze: The maze to search.
-    :param node: The current node being visited.
-    :param destination: The goal node.
-    :param visited: The set of visited nodes.
-    :param visited_list: The list of visited nodes in order.
-    :param parents: The dictionary mapping nodes to their parents.
+    :param node: The node to start from. Default is the maze's starting point.
+    :param destination: The goal node. Default is the maze's goal.
     :param max_depth: The maximum depth to search.
+    :param observer: An observer of the search, see maze.observers.
     :return: A tuple containing the list of visited nodes and the path from the start to the goal, if found.
     """
     if node is None:
         node = maze.starting_point
-    if parents is None:
-        parents = {}
-    if visited_list is None:
-        visited_list = [node]
     if destination is None:
         destination = maze.goal
-    if visited is None:
-        visited = {node}
+    visited_list, path, _ = __depth_limited_search(maze, node, destination, max_depth, observer)
+    return visited_list, path
 
-    if node == destination:
-        path = __retrace_path(maze, parents)
-        return visited_list, path
 
-    if max_depth is not None:
-        if max_depth <= 0:
-            return visited_list, None
+def __depth_limited_search(maze: Maze, node: int, destination: int, max_depth: int | None,
+                           observer: SearchObserver | None = None) -> tuple[list[int], list[int] | None, bool]:
+    """
+    Iterative Depth-First Search, optionally limited in depth.
+
+    Neighbours are explored clockwise and nodes are added to the visited list when first reached.
+    Without a depth limit, every node is reached at most once. With one, a node is reached again when a shorter
+    branch leads to it, since the first branch may have stopped at the limit before exploring past it.
+
+    :param maze: The maze to search.
+    :param node: The node to start from.
+    :param destination: The goal node.
+    :param max_depth: The maximum depth to search, or None for no limit.
+    :param observer: An observer of the search, if any.
+    :return: A tuple containing the list of visited nodes, the path from node to destination if found,
+             and whether the depth limit kept some nodes from being explored.
+    """
+    visited_list = observers.visited_list(observer, [node])
+    if node == destination:
+        return visited_list, [node], False
+    if max_depth is not None and max_depth <= 0:
+        return visited_list, None, True
+    masks, moves = maze.neighbour_index.masks, maze.neighbour_index.moves
+    depths = {node: 0}
+    # The current branch, and the neighbours left to explore for each of its nodes
+    stack = observers.stack(observer, [node])
+    iterators = [map(node.__add__, moves[masks[node]])]
+    cut_off = False
+    while iterators:
+        depth = len(stack)
+        for n in iterators[-1]:
+            previous_depth = depths.get(n)
+            if previous_depth is not None and (max_depth is None or previous_depth <= depth):
+                continue
+            if previous_depth is None:
+                visited_list.append(n)
+            depths[n] = depth
+            if n == destination:
+                stack.append(n)
+                return visited_list, stack, cut_off
+            if max_depth is not None and depth >= max_depth:
+                # Dead ends have nothing left to explore past the limit
+                cut_off = cut_off or len(moves[masks[n]]) > 1
+                continue
+            stack.append(n)
+            iterators.append(map(n.__add__, moves[masks[n]]))
+            break
         else:
-            max_depth -= 1
-
-    neighbours = maze.get_visitable_neighbours(node)
-    unvisited_neighbours = [x for x in neighbours if x not in visited]
-    for n in unvisited_neighbours:
-        visited.add(n)
-        visited_list.append(n)
-        parents[n] = node
-        result = dfs(maze, n, destination, visited, visited_list, parents, max_depth)
-
-        # To propagate the solution found in case we call and don't find it
-        if result[1] is not None:
-            return result
-    return visited_list, None
+            stack.pop()
+            iterators.pop()
+    return visited_list, None, cut_off
 
 
-def ucs(maze: Maze) -> tuple[list[int], list[int] | None]:
+@observable
+def ucs(maze: Maze, observer: SearchObserver | None = None) -> tuple[list[int], list[int] | None]:
     """
-    Performs Uniform Cost Search (UCS) on the maze.
+    Performs Uniform Cost Search (UCS) on the maze, taking the cost of each cell into account.
 
     :param maze: The maze to search.
+    :param observer: An observer of the search, see maze.observers.
     :return: A tuple containing the list of visited nodes and the path from the start to the goal, if found.
     """
     node = maze.starting_point
-    pq = PriorityQueue()
-    pq.put((0, node))
     destination = maze.goal
-    cumulated_cost = 0
-    visited = {node}
-    visited_list = [node]
+    frontier = observers.heap(observer)
+    frontier.push(node, 0)
+    costs = {node: 0}
+    visited_list = observers.visited_list(observer, [node])
     parents = {}
-    while pq.queue:
-        cumulated_cost, node = pq.get()
+    masks, moves = maze.neighbour_index.masks, maze.neighbour_index.moves
+    node_costs = __node_costs(maze)
+    edge_costs = maze.edge_costs
+    while frontier:
+        node, cumulated_cost = frontier.pop()
         if node == destination:
-            path = __retrace_path(maze, parents)
+            path = retrace_path(maze, parents)
             return visited_list, path
-        neighbours = maze.get_visitable_neighbours(node)
-        next_nodes = [n for n in neighbours if n not in visited and n not in pq.queue]
-        for n in next_nodes:
-            visited.add(n)
-            visited_list.append(n)
+        # Indexed by the neighbour entered either way
+        steps = node_costs if edge_costs is None else edge_costs[node]
+        for move in moves[masks[node]]:
+            n = node + move
+            cost = cumulated_cost + (1 if steps is None else steps[n])
+            previous_cost = costs.get(n)
+            if previous_cost is None:
+                visited_list.append(n)
+            # Nodes no longer in the frontier already have their lowest cost
+            elif previous_cost <= cost or n not in frontier:
+                continue
+            costs[n] = cost
             parents[n] = node
-            pq.put((cumulated_cost + 1, n))
+            frontier.push_or_decrease(n, cost)
     return visited_list, None
 
 
-def idfs(maze: Maze, max_depth: int | None = None, min_depth: int = 1):
+@observable
+def idfs(maze: Maze, max_depth: int | None = None, min_depth: int = 1,
+         observer: SearchObserver | None = None) -> tuple[list[int], list[int] | None]:
     """
     Performs Iterative Deepening Depth-First Search (IDFS) on the maze.
+    It stops early when the whole reachable part of the maze was explored within the current depth.
 
     :param maze: The maze to search.
-    :param max_depth: The maximum depth to search.
+    :param max_depth: The maximum depth to search, included. Default is the longest path the maze can hold.
     :param min_depth: The minimum depth to start searching.
+    :param observer: An observer of the search, see maze.observers. Each depth is a phase of the search.
     :return: A tuple containing the list of visited nodes and the path from the start to the goal, if found.
     """
     if max_depth is None:
-        max_depth = maze.adjacency_matrix_length # So I guess none ?
-    r = None
-    for depth in range(min_depth, max_depth):
-        r = dfs(maze, max_depth=depth)
-        if r[1] is not None:
-            return r
-    return r
+        # A path never has more moves than the maze has cells
+        max_depth = maze.adjacency_matrix_length - 1
+    if maze.starting_point == maze.goal or min_depth > max_depth:
+        # Searching at depth 0 only reaches the start
+        visited_list, path, _ = __depth_limited_search(maze, maze.starting_point, maze.goal, 0, observer)
+        return visited_list, path
+    for depth in range(min_depth, max_depth + 1):
+        if observer is not None:
+            observer.on_phase(f'depth {depth}')
+        visited_list, path, cut_off = __depth_limited_search(maze, maze.starting_point, maze.goal, depth, observer)
+        # Deeper iterations can't reach anything new once nothing was cut off by the limit
+        if path is not None or not cut_off:
+            break
+    return visited_list, path
 
 
+@observable
+def a_star(maze: Maze, heuristic=manhattan, weight: float = 1.0,
+           observer: SearchObserver | None = None) -> tuple[list[int], list[int] | None]:
+    """
+    Performs A* Search on the maze.
 
-def __retrace_path(maze: Maze, parents: dict[int, int]) -> list[int]:
+    :param maze: The maze to search.
+    :param heuristic: A function (maze, node, goal) estimating the cost from node to goal. See maze.heuristics.
+    :param weight: The factor applied to the heuristic. Values above 1 give Weighted A*, which expands fewer nodes
+                   but returns paths at most weight times longer than the shortest one.
+                   The heuristics assume each move costs at least 1.
+    :param observer: An observer of the search, see maze.observers.
+    :return: A tuple containing the list of visited nodes and the path from the start to the goal, if found.
     """
-    Retraces the path from the goal to the start using the parents dictionary.
+    return __best_first_search(maze, heuristic, 1.0, weight, observer)
 
-    :param maze: The maze being searched.
-    :param parents: The dictionary mapping nodes to their parents.
-    :return: The path from the start to the goal.
+
+@observable
+def greedy_best_first(maze: Maze, heuristic=manhattan,
+                      observer: SearchObserver | None = None) -> tuple[list[int], list[int] | None]:
+    """
+    Performs Greedy Best-First Search on the maze, always expanding the node that looks closest to the goal.
+    The path found is not guaranteed to be the shortest one.
+
+    :param maze: The maze to search.
+    :param heuristic: A function (maze, node, goal) estimating the cost from node to goal. See maze.heuristics.
+    :param observer: An observer of the search, see maze.observers.
+    :return: A tuple containing the list of visited nodes and the path from the start to the goal, if found.
+    """
+    return __best_first_search(maze, heuristic, 0.0, 1.0, observer)
+
+
+def __best_first_search(maze: Maze, heuristic, cost_weight: float, heuristic_weight: float,
+                        observer: SearchObserver | None = None) -> tuple[list[int], list[int] | None]:
+    """
+    Best-first search ordered by cost_weight * g(n) + heuristic_weight * h(n), using an indexed heap frontier.
+    Expanded nodes are never reopened.
+
+    :param maze: The maze to search.
+    :param heuristic: A function (maze, node, goal) estimating the cost from node to goal.
+    :param cost_weight: The factor applied to the cost from the start.
+    :param heuristic_weight: The factor applied to the heuristic.
+    :param observer: An observer of the search, if any.
+    :return: A tuple containing the list of visited nodes and the path from the start to the goal, if found.
     """
     starting_cell = maze.starting_point
-    goal = maze.goal
-    path = [goal]
+    destination = maze.goal
+    masks, moves = maze.neighbour_index.masks, maze.neighbour_index.moves
+    node_costs = __node_costs(maze)
+    edge_costs = maze.edge_costs
+    costs = {starting_cell: 0}
+    frontier = observers.heap(observer)
+    # Ties are broken in favour of the deepest node, which goes straight to the goal on open grids
+    frontier.push(starting_cell, (heuristic_weight * heuristic(maze, starting_cell, destination), 0))
+    visited_list = observers.visited_list(observer, [starting_cell])
+    parents = {}
+    while frontier:
+        node, _ = frontier.pop()
+        if node == destination:
+            path = retrace_path(maze, parents)
+            return visited_list, path
+        node_cost = costs[node]
+        # Indexed by the neighbour entered either way
+        steps = node_costs if edge_costs is None else edge_costs[node]
+        for move in moves[masks[node]]:
+            n = node + move
+            cost = node_cost + (1 if steps is None else steps[n])
+            previous_cost = costs.get(n)
+            if previous_cost is None:
+                visited_list.append(n)
+            elif previous_cost <= cost or n not in frontier:
+                continue
+            costs[n] = cost
+            parents[n] = node
+            priority = cost_weight * cost + heuristic_weight * heuristic(maze, n, destination)
+            frontier.push_or_decrease(n, (priority, -cost))
+    return visited_list, None
 
-    current = goal
-    while current != starting_cell:
-        next = parents[current]
-        path.append(parents[current])
-        current = next
-    path.append(starting_cell)
-    path.reverse()
+
+@observable
+def bidirectional_bfs(maze: Maze, observer: SearchObserver | None = None) -> tuple[list[int], list[int] | None]:
+    """
+    Performs Breadth-First Search from both the start and the goal until the two searches meet.
+    Each step expands a whole level of the smaller frontier.
+
+    :param maze: The maze to search.
+    :param observer: An observer of the search, see maze.observers. The two searches are the "forward" and
+                     "backward" phases.
+    :return: A tuple containing the list of visited nodes of both searches, in the order they were visited,
+             and the path from the start to the goal, if found.
+    """
+    starting_cell = maze.starting_point
+    destination = maze.goal
+    if starting_cell == destination:
+        return observers.visited_list(observer, [starting_cell]), [starting_cell]
+    neighbours = maze.neighbour_index
+    forward_depths, backward_depths = {starting_cell: 0}, {destination: 0}
+    forward_parents, backward_parents = {}, {}
+    forward_frontier = observers.queue(observer, [starting_cell])
+    backward_frontier = observers.queue(observer, [destination])
+    visited_list = observers.visited_list(observer, [starting_cell, destination])
+    meeting = None
+    while forward_frontier and backward_frontier and meeting is None:
+        if len(forward_frontier) <= len(backward_frontier):
+            if observer is not None:
+                observer.on_phase("forward")
+            forward_frontier, meeting = __expand_level(neighbours, forward_frontier, forward_depths, forward_parents,
+                                                       backward_depths, visited_list, observer)
+        else:
+            if observer is not None:
+                observer.on_phase("backward")
+            backward_frontier, meeting = __expand_level(neighbours, backward_frontier, backward_depths,
+                                                        backward_parents, forward_depths, visited_list, observer)
+    if meeting is None:
+        return visited_list, None
+    return visited_list, __stitch_paths(maze, forward_parents, backward_parents, meeting)
+
+
+def __expand_level(neighbours: NeighbourIndex, frontier: deque, depths: dict[int, int],
+                   parents: dict[int, int], other_depths: dict[int, int], visited_list: list[int],
+                   observer: SearchObserver | None = None) -> tuple[deque, int | None]:
+    """
+    Expands one level of a bidirectional Breadth-First Search.
+    The whole level is expanded even after the searches met, to keep the meeting node that gives the shortest path.
+
+    :param neighbours: The neighbour index of the maze.
+    :param frontier: The nodes of the current level, emptied as they are expanded.
+    :param depths: The depth of every node reached by this search.
+    :param parents: The parents of every node reached by this search.
+    :param other_depths: The depth of every node reached by the search from the other side.
+    :param visited_list: The list of visited nodes of both searches, in order.
+    :param observer: An observer of the search, if any.
+    :return: A tuple containing the next level and the meeting node, if the searches met.
+    """
+    masks, moves = neighbours.masks, neighbours.moves
+    next_frontier = observers.queue(observer)
+    meeting = None
+    best_depth = None
+    while frontier:
+        current = frontier.popleft()
+        depth = depths[current] + 1
+        for move in moves[masks[current]]:
+            n = current + move
+            if n in depths:
+                continue
+            depths[n] = depth
+            parents[n] = current
+            visited_list.append(n)
+            next_frontier.append(n)
+            other_depth = other_depths.get(n)
+            if other_depth is not None and (best_depth is None or other_depth < best_depth):
+                meeting, best_depth = n, other_depth
+    return next_frontier, meeting
+
+
+@observable
+def bidirectional_a_star(maze: Maze, heuristic=manhattan,
+                         observer: SearchObserver | None = None) -> tuple[list[int], list[int] | None]:
+    """
+    Performs A* Search from both the start and the goal until the two searches meet.
+
+    Both searches use the average of the two front-to-end heuristics, (h(n, goal) - h(n, start)) / 2 and its
+    opposite, which stay consistent, so the search can stop as soon as the sum of the two smallest frontier keys
+    reaches the length of the best path found so far.
+
+    :param maze: The maze to search.
+    :param heuristic: A consistent function (maze, node, goal) estimating the cost from node to goal.
+    :param observer: An observer of the search, see maze.observers.
+    :return: A tuple containing the list of visited nodes of both searches, in the order they were visited,
+             and the path from the start to the goal, if found.
+    """
+    starting_cell = maze.starting_point
+    destination = maze.goal
+    if starting_cell == destination:
+        return observers.visited_list(observer, [starting_cell]), [starting_cell]
+    masks, moves = maze.neighbour_index.masks, maze.neighbour_index.moves
+    node_costs = __node_costs(maze)
+    edge_costs = maze.edge_costs
+
+    def potential(node: int) -> float:
+        return (heuristic(maze, node, destination) - heuristic(maze, node, starting_cell)) / 2
+
+    forward_costs, backward_costs = {starting_cell: 0}, {destination: 0}
+    forward_parents, backward_parents = {}, {}
+    forward_frontier, backward_frontier = observers.heap(observer), observers.heap(observer)
+    # Ties are broken in favour of the deepest node, like in A*
+    forward_frontier.push(starting_cell, (potential(starting_cell), 0))
+    backward_frontier.push(destination, (-potential(destination), 0))
+    visited_list = observers.visited_list(observer, [starting_cell, destination])
+    best_length = float("inf")
+    meeting = None
+    while forward_frontier and backward_frontier:
+        forward_top = forward_frontier.peek()[1][0]
+        backward_top = backward_frontier.peek()[1][0]
+        if forward_top + backward_top >= best_length:
+            break
+        if forward_top <= backward_top:
+            node, _ = forward_frontier.pop()
+            cost = forward_costs[node]
+            steps = node_costs if edge_costs is None else edge_costs[node]
+            for move in moves[masks[node]]:
+                n = node + move
+                # Moving forward into n costs the cost of n
+                n_cost = cost + (1 if steps is None else steps[n])
+                if not __relax(n, node, n_cost, forward_costs, forward_parents, forward_frontier,
+                               potential(n), visited_list):
+                    continue
+                if n in backward_costs and n_cost + backward_costs[n] < best_length:
+                    best_length, meeting = n_cost + backward_costs[n], n
+        else:
+            node, _ = backward_frontier.pop()
+            cost = backward_costs[node]
+            # Moving backward from node to n stands for the move from n into node
+            n_cost = cost + (1 if node_costs is None else node_costs[node])
+            for move in moves[masks[node]]:
+                n = node + move
+                if edge_costs is not None:
+                    n_cost = cost + edge_costs[n][node]
+                if not __relax(n, node, n_cost, backward_costs, backward_parents, backward_frontier,
+                               -potential(n), visited_list):
+                    continue
+                if n in forward_costs and n_cost + forward_costs[n] < best_length:
+                    best_length, meeting = n_cost + forward_costs[n], n
+    if meeting is None:
+        return visited_list, None
+    return visited_list, __stitch_paths(maze, forward_parents, backward_parents, meeting)
+
+
+def __relax(node: int, parent: int, cost: float, costs: dict[int, float], parents: dict[int, int],
+            frontier: IndexedHeap, potential: float, visited_list: list[int]) -> bool:
+    """
+    Updates the cost of a node reached by a Dijkstra-like search if the new cost is lower.
+
+    :param node: The node reached.
+    :param parent: The node it was reached from.
+    :param cost: The cost of reaching it through parent.
+    :param costs: The lowest cost known for every node reached.
+    :param parents: The parents of every node reached.
+    :param frontier: The frontier of the search.
+    :param potential: The heuristic value added to the cost to get the node's priority.
+    :param visited_list: The list of visited nodes, in order.
+    :return: True if the node's cost changed.
+    """
+    previous_cost = costs.get(node)
+    if previous_cost is None:
+        visited_list.append(node)
+    elif previous_cost <= cost or node not in frontier:
+        return False
+    costs[node] = cost
+    parents[node] = parent
+    frontier.push_or_decrease(node, (cost + potential, -cost))
+    return True
+
+
+def __stitch_paths(maze: Maze, forward_parents: dict[int, int], backward_parents: dict[int, int],
+                   meeting: int) -> list[int]:
+    """
+    Joins the paths found by the searches from the start and from the goal of a bidirectional search.
+
+    :param maze: The maze being searched.
+    :param forward_parents: The parents of the nodes reached from the start.
+    :param backward_parents: The parents of the nodes reached from the goal.
+    :param meeting: A node reached by both searches.
+    :return: The path from the start to the goal.
+    """
+    path = retrace_path(maze, forward_parents, maze.starting_point, meeting)
+    backward_path = retrace_path(maze, backward_parents, maze.goal, meeting)
+    path.extend(reversed(backward_path[:-1]))
     return path
 
-def fill_cells(maze: Maze, cells: set[int] | list[int], color: tuple[float, float, float], delay=16):
-    screen_size = pygame.display.get_window_size()
-    screen_width, _ = screen_size
-    cell_size = screen_width / maze.grid_length
-    for node in cells:
-        x, y = maze.get_coordinate(node)
-        cell_x = x * cell_size
-        cell_y = y * cell_size
-        cell_x_end = cell_x + cell_size
-        cell_y_end = cell_y + cell_size
 
-        l1 = coords_to_glcoords((cell_x, cell_y), screen_size)
-        l2 = coords_to_glcoords((cell_x_end, cell_y), screen_size)
-        l3 = coords_to_glcoords((cell_x_end, cell_y_end), screen_size)
-        l4 = coords_to_glcoords((cell_x, cell_y_end), screen_size)
+@observable
+def jps(maze: Maze, heuristic=manhattan, observer: SearchObserver | None = None) -> tuple[list[int], list[int] | None]:
+    """
+    Performs Jump Point Search (JPS) on the maze, adapted to 4-connected grids with walls between cells.
+
+    Among the shortest paths, JPS only follows the ones that move vertically as early as possible. Such a path can
+    only turn from a horizontal move to a vertical one at a "forced" cell, where the same turn one cell earlier is
+    blocked by a wall. Straight moves are therefore jumped over until the goal, a forced cell, or, when moving
+    vertically, a cell from which a horizontal jump finds one of those. Only these jump points enter the frontier,
+    which makes it much faster than A* on open grids.
+
+    Mazes with cell or edge costs aren't uniform-cost grids, so they are searched with A* instead.
 
-        gl.glColor3f(color[0], color[1], color[2])
-        gl.glBegin(gl.GL_QUADS)
+    :param maze: The maze to search.
+    :param heuristic: A function (maze, node, goal) estimating the cost from node to goal. See maze.heuristics.
+    :param observer: An observer of the search, see maze.observers. Only jump points enter the frontier.
+    :return: A tuple containing the list of jump points reached, and the path from the start to the goal, if found.
+    """
+    if maze.node_costs is not None or maze.edge_costs is not None:
+        return __best_first_search(maze, heuristic, 1.0, 1.0, observer)
+    starting_cell = maze.starting_point
+    destination = maze.goal
+    grid_length = maze.grid_length
+    masks = memoryview(maze.walls.masks)
+    offsets = maze.walls.offsets
+
+    def jump_horizontal(node: int, direction: int) -> int | None:
+        step = offsets[direction]
+        bit = WALL_BITS[direction]
+        while not masks[node] & bit:
+            previous, node = node, node + step
+            if node == destination:
+                return node
+            for perpendicular in (TOP, BOTTOM):
+                perpendicular_bit = WALL_BITS[perpendicular]
+                if masks[node] & perpendicular_bit:
+                    continue
+                # Turning one cell earlier is as short, and preferred, unless a wall is in the way
+                if masks[previous] & perpendicular_bit or masks[previous + offsets[perpendicular]] & bit:
+                    return node
+        return None
+
+    def jump_vertical(node: int, direction: int) -> int | None:
+        step = offsets[direction]
+        bit = WALL_BITS[direction]
+        while not masks[node] & bit:
+            node += step
+            if node == destination or jump_horizontal(node, RIGHT) is not None \
+                    or jump_horizontal(node, LEFT) is not None:
+                return node
+        return None
+
+    costs = {starting_cell: 0}
+    # Direction in which each jump point was reached, which decides the directions worth jumping to from there
+    arrivals = {starting_cell: None}
+    parents = {}
+    frontier = observers.heap(observer)
+    frontier.push(starting_cell, (heuristic(maze, starting_cell, destination), 0))
+    visited_list = observers.visited_list(observer, [starting_cell])
+    while frontier:
+        node, _ = frontier.pop()
+        if node == destination:
+            jump_points = retrace_path(maze, parents)
+            return visited_list, __fill_straight_segments(jump_points, grid_length)
+        arrival = arrivals[node]
+        if arrival is None:
+            directions = (TOP, RIGHT, BOTTOM, LEFT)
+        elif arrival in (RIGHT, LEFT):
+            directions = (arrival, TOP, BOTTOM)
+        else:
+            directions = (arrival, RIGHT, LEFT)
+        for direction in directions:
+            if direction in (RIGHT, LEFT):
+                successor = jump_horizontal(node, direction)
+                if successor is None:
+                    continue
+                cost = costs[node] + abs(successor - node) // grid_length
+            else:
+                successor = jump_vertical(node, direction)
+                if successor is None:
+                    continue
+                cost = costs[node] + abs(successor - node)
+            if __relax(successor, node, cost, costs, parents, frontier,
+                       heuristic(maze, successor, destination), visited_list):
+                arrivals[successor] = direction
+    return visited_list, None
+
+
+def __fill_straight_segments(jump_points: list[int], grid_length: int) -> list[int]:
+    """
+    Expands a path made of jump points, each in a straight line from the previous one, into a path of adjacent cells.
+
+    :param jump_points: The jump points from the start to the goal.
+    :param grid_length: The side length of the maze.
+    :return: The path from the start to the goal.
+    """
+    path = jump_points[:1]
+    for previous, current in zip(jump_points, jump_points[1:]):
+        # Horizontal moves change the node ID by multiples of grid_length, vertical moves by less than that
+        step = grid_length if abs(current - previous) >= grid_length else 1
+        if current < previous:
+            step = -step
+        path.extend(range(previous + step, current + step, step))
+    return path
 
-        gl.glVertex2f(l1[0], l1[1])
-        gl.glVertex2f(l2[0], l2[1])
-        gl.glVertex2f(l3[0], l3[1])
-        gl.glVertex2f(l4[0], l4[1])
-        gl.glEnd()
-        if isinstance(cells, list):
-            maze.draw()
-            pygame.display.flip()
-            pygame.time.delay(delay)
-    maze.draw()
-    pygame.time.wait(delay)
-    pygame.display.flip()
 
-def draw_path(maze: Maze, path: list[int]):
+def __node_costs(maze: Maze) -> list[float] | None:
     """
-    Draws the path in the maze.
+    Returns the cost of entering each cell as a list, faster to index than a NumPy array in a search loop.
 
-    :param maze: The maze being drawn.
-    :param path: The list of nodes representing the path.
+    :param maze: The maze being searched.
+    :return: The list of costs indexed by node ID, or None if every move costs 1.
     """
-    fill_cells(maze, path, COLORS["PATH_NODE"], 0)
-    pygame.time.wait(2000)
+    if maze.node_costs is None:
+        return None
+    return maze.node_costs.tolist()
+
 
-def draw_visited(maze: Maze, visited: set[int] | list[int]):
+def retrace_path(maze: Maze, parents: dict[int, int],
+                 starting_cell: int | None = None, goal: int | None = None) -> list[int]:
     """
-    Draws the visited nodes in the maze.
-    :param maze: The maze being drawn.
-    :param visited: The set or list of visited nodes.
+    Retraces the path from the goal to the start using the parents dictionary.
+
+    :param maze: The maze being searched.
+    :param parents: The dictionary mapping nodes to their parents.
+    :param starting_cell: The root of the parents dictionary. Default is the maze's starting point.
+    :param goal: The node to retrace the path from. Default is the maze's goal.
+    :return: The path from the start to the goal.
     """
-    fill_cells(maze, visited, COLORS["VISITED_NODE"])
+    if starting_cell is None:
+        starting_cell = maze.starting_point
+    if goal is None:
+        goal = maze.goal
+    path = [goal]
+
+    current = goal
+    while current != starting_cell:
+        current = parents[current]
+        path.append(current)
+    path.reverse()
+    return path
+
+# Drawing functions of the rendering layer, only imported when used so that searches run without a display
+_RENDERING_FUNCTIONS = {"draw_cells", "fill_cells", "draw_path", "draw_visited"}
+
 
+def __getattr__(name: str):
+    if name in _RENDERING_FUNCTIONS:
+        from maze import renderer
+        return getattr(renderer, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 ALGORITHMS = {
-    "Depth-First Search": lambda maze: dfs(maze),
-    "Breadth-First Search": lambda maze: bfs(maze),
-    "Uniform Cost Search": lambda maze: ucs(maze),
-    "Iterative Depth-deepening Search": lambda maze: idfs(maze),
+    "Depth-First Search": lambda maze, observer=None: dfs(maze, observer=observer),
+    "Breadth-First Search": lambda maze, observer=None: bfs(maze, observer=observer),
+    "Uniform Cost Search": lambda maze, observer=None: ucs(maze, observer=observer),
+    "Iterative Depth-deepening Search": lambda maze, observer=None: idfs(maze, observer=observer),
+    "A* Search": lambda maze, observer=None: a_star(maze, observer=observer),
+    "A* Search (Octile)": lambda maze, observer=None: a_star(maze, HEURISTICS["Octile"], observer=observer),
+    "Weighted A* Search": lambda maze, observer=None: a_star(maze, weight=2.0, observer=observer),
+    "Greedy Best-First Search": lambda maze, observer=None: greedy_best_first(maze, observer=observer),
+    "Bidirectional Breadth-First Search": lambda maze, observer=None: bidirectional_bfs(maze, observer=observer),
+    "Bidirectional A* Search": lambda maze, observer=None: bidirectional_a_star(maze, observer=observer),
+    "Jump Point Search": lambda maze, observer=None: jps(maze, observer=observer),
 }
\ No newline at end of file
@@ -0,0 +1,513 @@
+"""
+Maze solving service.
+
+Serves the search algorithms over a small HTTP/JSON API on a local TCP port or Unix socket, so that other programs can
+solve mazes without opening a window. Searches run in a pool of processes, identical requests in progress are solved
+once, and solved paths are kept in a bounded cache.
+
+Endpoints :
+
+- POST /mazes, with a maze in the binary format of maze.storage as body, registers it and returns its hash.
+- POST /solve, with a JSON object holding either "maze", the hash of a registered maze, or "maze_data", a maze in the
+  binary format encoded in base64, along with "algorithm" and optionally "start" and "goal" node IDs. It returns the
+  path, or null if the goal can't be reached.
+- GET /metrics returns the cache hits and misses, the number of coalesced requests and the latency of /solve.
+
+Example, from the root of the repository :
+
+    python -m maze.service --port 8765
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import http.client
+import json
+import os
+import signal
+import socket
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from maze import Maze, search
+from maze.grid import WallGrid
+from maze.storage import MazeHeader, pack_maze, unpack_maze
+
+# Largest request body accepted, enough for a 10000x10000 maze in base64
+MAX_BODY_BYTES = 256 * 2 ** 20
+# Number of /solve latencies the percentiles are computed from
+LATENCY_SAMPLES = 1024
+# Number of mazes each worker process keeps attached
+WORKER_MAZES = 8
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+            500: "Internal Server Error"}
+
+# Mazes attached by the current worker process, by shared memory name, the least recently used first
+_worker_mazes = OrderedDict()
+
+
+class ServiceError(Exception):
+    """
+    A request the service can't answer, along with its HTTP status.
+    """
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def maze_hash(masks: np.ndarray, grid_length: int, start: int, goal: int) -> str:
+    """
+    Computes the hash identifying a maze in the service, from its walls and the default start and goal of its requests.
+
+    :param masks: The wall masks of every cell, in node ID order.
+    :param grid_length: The side length of the maze.
+    :param start: The starting point's node ID.
+    :param goal: The goal's node ID.
+    :return: The hexadecimal SHA-256 digest.
+    """
+    digest = hashlib.sha256(b"".join(value.to_bytes(8, "little") for value in (grid_length, start, goal)))
+    digest.update(np.ascontiguousarray(masks, dtype=np.uint8).data)
+    return digest.hexdigest()
+
+
+def _attach_maze(block_name: str, grid_length: int) -> Maze:
+    """
+    Builds a maze over walls in shared memory, keeping the most recently used ones attached.
+    """
+    if block_name in _worker_mazes:
+        _worker_mazes.move_to_end(block_name)
+    else:
+        block = shared_memory.SharedMemory(name=block_name)
+        masks = np.ndarray((grid_length * grid_length,), dtype=np.uint8, buffer=block.buf)
+        _worker_mazes[block_name] = block, Maze(generator=None, walls=WallGrid(grid_length, masks))
+        while len(_worker_mazes) > WORKER_MAZES:
+            old_block, old_maze = _worker_mazes.popitem(last=False)[1]
+            # The arrays over the block have to be gone before it can be closed
+            del old_maze
+            old_block.close()
+    return _worker_mazes[block_name][1]
+
+
+def solve(job: dict) -> dict:
+    """
+    Runs one search algorithm on one shared maze, in a worker process.
+
+    :param job: The job, holding the maze's shared memory block name and side length, the start, the goal and the
+                algorithm name.
+    :return: The path, or None, the number of expanded nodes and the search time in seconds.
+    """
+    maze = _attach_maze(job["block"], job["grid_length"])
+    maze.starting_point = job["start"]
+    maze.goal = job["goal"]
+    start_time = time.perf_counter()
+    visited, path = search.ALGORITHMS[job["algorithm"]](maze)
+    return {"path": path, "expanded_nodes": len(visited), "search_time": time.perf_counter() - start_time}
+
+
+class SolverService:
+    """
+    Answers solving requests, independently of how they are received.
+
+    Registered mazes are copied into shared memory, from which the worker processes read them. Solved paths are kept
+    in a least recently used cache keyed by (maze hash, start, goal, algorithm), and requests for a key being solved
+    wait for that search instead of starting another one.
+    """
+    def __init__(self, workers: int | None = None, cache_size: int = 1024, max_mazes: int = 64) -> None:
+        """
+        :param workers: The number of worker processes. Default is one per CPU.
+        :param cache_size: The number of solved paths to keep.
+        :param max_mazes: The number of registered mazes to keep, the least recently used being dropped first.
+        """
+        self.cache_size = cache_size
+        self.max_mazes = max_mazes
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+        # (block, grid length, start, goal) by maze hash, the least recently used first
+        self._mazes = OrderedDict()
+        self._results = OrderedDict()
+        # Futures of the searches in progress, by cache key
+        self._in_flight = {}
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def register(self, data: bytes) -> dict:
+        """
+        Registers a maze in the binary maze format.
+
+        :param data: The encoded maze.
+        :return: The maze's hash, side length, starting point and goal.
+        """
+        try:
+            header, masks = unpack_maze(data)
+        except ValueError as error:
+            raise ServiceError(400, str(error)) from None
+        if header.width != header.height:
+            raise ServiceError(400, f'Mazes are square, not {header.width}x{header.height}')
+        # The same walls with another start or goal are another maze, whose requests default to them
+        key = maze_hash(masks, header.width, header.start, header.goal)
+        if key in self._mazes:
+            self._mazes.move_to_end(key)
+        else:
+            block = shared_memory.SharedMemory(create=True, size=max(masks.nbytes, 1))
+            np.ndarray(masks.shape, dtype=np.uint8, buffer=block.buf)[:] = masks
+            self._mazes[key] = block, header.width, header.start, header.goal
+            self.__evict_mazes()
+        _, grid_length, start, goal = self._mazes[key]
+        return {"maze": key, "grid_length": grid_length, "start": start, "goal": goal}
+
+    async def solve(self, request: dict) -> dict:
+        """
+        Solves a maze, or answers from the cache.
+
+        :param request: The request, see the module's documentation.
+        :return: The response, holding the path and whether it came from the cache or from an identical request.
+        """
+        start_time = time.perf_counter()
+        try:
+            response = await self.__solve(request)
+        except ServiceError:
+            self.errors += 1
+            raise
+        self._latencies.append(time.perf_counter() - start_time)
+        return response
+
+    def metrics(self) -> dict:
+        """
+        Gets the counters of the service and the latency of solving requests, in seconds.
+        """
+        latencies = sorted(self._latencies)
+
+        def percentile(fraction: float) -> float | None:
+            if not latencies:
+                return None
+            return latencies[min(int(fraction * len(latencies)), len(latencies) - 1)]
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "in_flight": len(self._in_flight),
+            "cached_paths": len(self._results),
+            "mazes": len(self._mazes),
+            "latency": {
+                "samples": len(latencies),
+                "mean": sum(latencies) / len(latencies) if latencies else None,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": latencies[-1] if latencies else None,
+            },
+        }
+
+    def close(self) -> None:
+        """
+        Stops the worker processes and frees the registered mazes.
+        """
+        self._executor.shutdown(cancel_futures=True)
+        for block, *_ in self._mazes.values():
+            block.close()
+            block.unlink()
+        self._mazes.clear()
+
+    async def __solve(self, request: dict) -> dict:
+        if not isinstance(request, dict):
+            raise ServiceError(400, "Expected a JSON object")
+        if "maze_data" in request:
+            try:
+                data = base64.b64decode(request["maze_data"], validate=True)
+            except (TypeError, ValueError):
+                raise ServiceError(400, "maze_data isn't valid base64") from None
+            key = self.register(data)["maze"]
+        elif "maze" in request:
+            key = request["maze"]
+        else:
+            raise ServiceError(400, "Expected maze or maze_data")
+        if key not in self._mazes:
+            raise ServiceError(404, f'Unknown maze {key}, register it first')
+        self._mazes.move_to_end(key)
+        block, grid_length, default_start, default_goal = self._mazes[key]
+        algorithm = request.get("algorithm")
+        if algorithm not in search.ALGORITHMS:
+            raise ServiceError(400, f'Unknown algorithm {algorithm!r}, expected one of {list(search.ALGORITHMS)}')
+        start = self.__node(request, "start", default_start, grid_length)
+        goal = self.__node(request, "goal", default_goal, grid_length)
+        cache_key = key, start, goal, algorithm
+        response = {"maze": key, "start": start, "goal": goal, "algorithm": algorithm,
+                    "cached": False, "coalesced": False}
+        if cache_key in self._results:
+            self.hits += 1
+            self._results.move_to_end(cache_key)
+            response.update(self._results[cache_key], cached=True)
+            return response
+        if cache_key in self._in_flight:
+            self.coalesced += 1
+            response.update(await asyncio.shield(self._in_flight[cache_key]), coalesced=True)
+            return response
+        self.misses += 1
+        job = {"block": block.name, "grid_length": grid_length, "start": start, "goal": goal, "algorithm": algorithm}
+        future = asyncio.get_running_loop().run_in_executor(self._executor, solve, job)
+        self._in_flight[cache_key] = future
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            del self._in_flight[cache_key]
+        self._results[cache_key] = result
+        while len(self._results) > self.cache_size:
+            self._results.popitem(last=False)
+        response.update(result)
+        return response
+
+    @staticmethod
+    def __node(request: dict, name: str, default: int, grid_length: int) -> int:
+        node = request.get(name, default)
+        if not isinstance(node, int) or isinstance(node, bool) or not 0 <= node < grid_length * grid_length:
+            raise ServiceError(400, f'{name} must be a node ID between 0 and {grid_length * grid_length - 1}')
+        return node
+
+    def __evict_mazes(self) -> None:
+        """
+        Drops the least recently used mazes over the limit, except those being solved.
+        """
+        busy = {key for key, *_ in self._in_flight}
+        for key in list(self._mazes):
+            if len(self._mazes) <= self.max_mazes:
+                break
+            if key in busy:
+                continue
+            block = self._mazes.pop(key)[0]
+            block.close()
+            block.unlink()
+
+
+class HTTPServer:
+    """
+    Serves a SolverService over HTTP/1.1, with keep-alive connections.
+    """
+    def __init__(self, service: SolverService) -> None:
+        self.service = service
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, unix_path: str | None = None) -> None:
+        """
+        Serves requests until cancelled.
+
+        :param host: The address to listen on.
+        :param port: The TCP port to listen on.
+        :param unix_path: A Unix socket path to listen on instead of the TCP port.
+        """
+        if unix_path is not None:
+            server = await asyncio.start_unix_server(self.handle_connection, unix_path)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Answers the requests of one connection, until the client closes it.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self.__respond(writer, 400, {"error": "Malformed request line"}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY_BYTES:
+                    await self.__respond(writer, 413 if length > 0 else 400, {"error": "Invalid body length"}, False)
+                    break
+                body = await reader.readexactly(length)
+                status, payload = await self.__route(method, urlsplit(target).path, body)
+                await self.__respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            # Also ends idle connections quietly when the server stops
+            pass
+        finally:
+            writer.close()
+
+    async def __route(self, method: str, path: str, body: bytes) -> tuple[int, dict]:
+        routes = {
+            "/mazes": ("POST", lambda: self.service.register(body)),
+            "/solve": ("POST", lambda: self.service.solve(self.__parse_json(body))),
+            "/metrics": ("GET", self.service.metrics),
+        }
+        if path not in routes:
+            return 404, {"error": f'No endpoint {path}'}
+        expected_method, handler = routes[path]
+        if method != expected_method:
+            return 405, {"error": f'{path} expects {expected_method}'}
+        try:
+            result = handler()
+            if asyncio.iscoroutine(result):
+                result = await result
+        except ServiceError as error:
+            return error.status, {"error": str(error)}
+        except Exception as error:
+            return 500, {"error": f'{type(error).__name__}: {error}'}
+        return 200, result
+
+    @staticmethod
+    def __parse_json(body: bytes):
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise ServiceError(400, "Body isn't valid JSON") from None
+
+    @staticmethod
+    async def __respond(writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool) -> None:
+        body = json.dumps(payload).encode()
+        head = (f'HTTP/1.1 {status} {_REASONS[status]}\r\n'
+                f'Content-Type: application/json\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str) -> None:
+        super().__init__("localhost")
+        self.unix_path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.unix_path)
+
+
+class ServiceClient:
+    """
+    Blocking client of the service, over one keep-alive connection.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, unix_path: str | None = None) -> None:
+        """
+        :param host: The address of the service.
+        :param port: The TCP port of the service.
+        :param unix_path: The Unix socket of the service, used instead of the TCP port.
+        """
+        if unix_path is not None:
+            self._connection = _UnixHTTPConnection(unix_path)
+        else:
+            self._connection = http.client.HTTPConnection(host, port)
+
+    def register(self, maze: Maze) -> str:
+        """
+        Sends a maze to the service.
+
+        :param maze: The maze, whose starting point and goal become the defaults of its requests.
+        :return: The maze's hash.
+        """
+        return self.__request("POST", "/mazes", encode_maze(maze), "application/octet-stream")["maze"]
+
+    def solve(self, maze: str | Maze, algorithm: str, start: int | None = None, goal: int | None = None) -> dict:
+        """
+        Solves a maze.
+
+        :param maze: The hash of a registered maze, or a maze to send along with the request.
+        :param algorithm: The name of the algorithm, one of search.ALGORITHMS.
+        :param start: The start's node ID. Default is the maze's starting point.
+        :param goal: The goal's node ID. Default is the maze's goal.
+        :return: The response, see the module's documentation.
+        """
+        request = {"algorithm": algorithm}
+        if isinstance(maze, Maze):
+            request["maze_data"] = base64.b64encode(encode_maze(maze)).decode("ascii")
+        else:
+            request["maze"] = maze
+        if start is not None:
+            request["start"] = start
+        if goal is not None:
+            request["goal"] = goal
+        return self.__request("POST", "/solve", json.dumps(request).encode(), "application/json")
+
+    def metrics(self) -> dict:
+        """
+        Gets the metrics of the service.
+        """
+        return self.__request("GET", "/metrics")
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __request(self, method: str, path: str, body: bytes | None = None, content_type: str | None = None) -> dict:
+        headers = {"Content-Type": content_type} if content_type is not None else {}
+        self._connection.request(method, path, body, headers)
+        response = self._connection.getresponse()
+        payload = json.loads(response.read())
+        if response.status != 200:
+            raise ServiceError(response.status, payload.get("error", response.reason))
+        return payload
+
+
+def encode_maze(maze: Maze) -> bytes:
+    """
+    Encodes a maze in the binary maze format, with 4 bits per cell.
+    """
+    header = MazeHeader(4, maze.grid_length, maze.grid_length, maze.starting_point, maze.goal, maze.seed)
+    return pack_maze(maze.walls.masks, header)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m maze.service", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="The address to listen on. Default is 127.0.0.1.")
+    parser.add_argument("--port", type=int, default=8765, help="The TCP port to listen on. Default is 8765.")
+    parser.add_argument("--unix", help="A Unix socket path to listen on instead of the TCP port.")
+    parser.add_argument("--workers", type=int, default=None, help="The number of processes. Default is one per CPU.")
+    parser.add_argument("--cache-size", type=int, default=1024, help="The number of solved paths to keep.")
+    parser.add_argument("--max-mazes", type=int, default=64, help="The number of registered mazes to keep.")
+    args = parser.parse_args(argv)
+
+    service = SolverService(args.workers, args.cache_size, args.max_mazes)
+    try:
+        asyncio.run(_serve_until_stopped(HTTPServer(service), args))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    finally:
+        service.close()
+        if args.unix is not None and os.path.exists(args.unix):
+            os.remove(args.unix)
+
+
+async def _serve_until_stopped(server: HTTPServer, args: argparse.Namespace) -> None:
+    """
+    Serves requests until the process is interrupted or terminated, so that the workers and mazes get freed.
+    """
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signal_number, task.cancel)
+        except NotImplementedError:
+            # Not available on Windows, where interrupting raises KeyboardInterrupt instead
+            pass
+    await server.serve(args.host, args.port, args.unix)
+
+
+if __name__ == "__main__":
+    main()
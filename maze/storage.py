@@ -0,0 +1,256 @@
+import struct
+from typing import NamedTuple
+
+import numpy as np
+
+from .generators import eller_stream
+
+# Binary maze format, little-endian :
+# - a 48 bytes header : magic, format version, bits per cell (4 or 8), a reserved byte, then width, height, start
+#   node, goal node and generation seed as unsigned 64 bits integers.
+# - the wall mask of every cell in node ID order, node = x * height + y. With 4 bits per cell, each byte holds two
+#   cells, the first one in its low nibble. The last byte is padded with zeros.
+MAGIC = b"MAZE"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHBBQQQQQ")
+# Seed stored for mazes that weren't generated from a seed
+NO_SEED = 2 ** 64 - 1
+
+
+def pack_masks(masks: np.ndarray) -> bytes:
+    """
+    Packs wall masks two per byte.
+
+    :param masks: The uint8 masks. Their count must be even.
+    :return: The packed bytes, the first mask of each pair in the low nibble.
+    """
+    masks = np.asarray(masks, dtype=np.uint8)
+    return (masks[0::2] | (masks[1::2] << 4)).tobytes()
+
+
+def unpack_masks(packed: np.ndarray, count: int) -> np.ndarray:
+    """
+    Unpacks wall masks stored two per byte.
+
+    :param packed: The packed bytes, as a uint8 array.
+    :param count: The number of masks to unpack.
+    :return: A new uint8 array of the masks.
+    """
+    masks = np.empty(2 * len(packed), dtype=np.uint8)
+    masks[0::2] = packed & 0b1111
+    masks[1::2] = packed >> 4
+    return masks[:count]
+
+
+class MazeHeader(NamedTuple):
+    """
+    The header of a maze file.
+    """
+    cell_bits: int
+    width: int
+    height: int
+    start: int
+    goal: int
+    seed: int | None
+
+
+def write_maze(path, masks: np.ndarray, header: MazeHeader) -> None:
+    """
+    Writes a whole maze to disk in the binary maze format.
+
+    :param path: The path of the file to write.
+    :param masks: The wall masks of every cell, in node ID order.
+    :param header: The description of the maze.
+    """
+    if header.cell_bits not in (4, 8):
+        raise ValueError(f'Cells are stored on 4 or 8 bits, not {header.cell_bits}')
+    with open(path, "wb") as file:
+        file.write(_pack_header(header))
+        file.write(_pack_body(masks, header.cell_bits))
+
+
+def pack_maze(masks: np.ndarray, header: MazeHeader) -> bytes:
+    """
+    Encodes a whole maze in the binary maze format, like write_maze but in memory.
+
+    :param masks: The wall masks of every cell, in node ID order.
+    :param header: The description of the maze.
+    :return: The encoded maze.
+    """
+    return _pack_header(header) + _pack_body(masks, header.cell_bits)
+
+
+def unpack_maze(data: bytes) -> tuple[MazeHeader, np.ndarray]:
+    """
+    Decodes a maze encoded in the binary maze format, like read_maze but from memory.
+
+    :param data: The encoded maze.
+    :return: A tuple containing the header and a new array of the wall masks of every cell, in node ID order.
+    """
+    header = _unpack_header(data[:HEADER.size], "Maze data")
+    count = header.width * header.height
+    stored = count if header.cell_bits == 8 else (count + 1) // 2
+    body = np.frombuffer(memoryview(data)[HEADER.size:HEADER.size + stored], dtype=np.uint8)
+    if len(body) < stored:
+        raise ValueError("Maze data is truncated")
+    return header, body.copy() if header.cell_bits == 8 else unpack_masks(body, count)
+
+
+def _pack_body(masks: np.ndarray, cell_bits: int) -> bytes:
+    if cell_bits not in (4, 8):
+        raise ValueError(f'Cells are stored on 4 or 8 bits, not {cell_bits}')
+    masks = np.asarray(masks, dtype=np.uint8)
+    if cell_bits == 8:
+        return masks.tobytes()
+    if len(masks) % 2:
+        masks = np.append(masks, np.uint8(0))
+    return pack_masks(masks)
+
+
+def _pack_header(header: MazeHeader) -> bytes:
+    seed = header.seed if header.seed is not None else NO_SEED
+    return HEADER.pack(MAGIC, FORMAT_VERSION, header.cell_bits, 0,
+                       header.width, header.height, header.start, header.goal, seed)
+
+
+def read_maze(path, mmap: bool = True) -> tuple[MazeHeader, np.ndarray]:
+    """
+    Reads a maze written in the binary maze format.
+
+    With mmap, files storing 8 bits per cell are memory-mapped in copy-on-write mode : opening them is instant, pages
+    are only read when the walls are accessed, and changes to the walls are never written back to the file. Files
+    storing 4 bits per cell, which have to be saved explicitly as such, are memory-mapped too, but have to be unpacked
+    into memory.
+
+    :param path: The path of the file to read.
+    :param mmap: Whether to memory-map the file instead of reading it.
+    :return: A tuple containing the header and the wall masks of every cell, in node ID order.
+    """
+    with open(path, "rb") as file:
+        raw_header = file.read(HEADER.size)
+    header = _unpack_header(raw_header, path)
+    cell_bits = header.cell_bits
+    count = header.width * header.height
+    stored = count if cell_bits == 8 else (count + 1) // 2
+    if mmap:
+        data = np.memmap(path, dtype=np.uint8, mode="c" if cell_bits == 8 else "r", offset=HEADER.size,
+                         shape=(stored,))
+    else:
+        data = np.fromfile(path, dtype=np.uint8, count=stored, offset=HEADER.size)
+        if len(data) < stored:
+            raise ValueError(f'{path} is truncated')
+    if cell_bits == 4:
+        data = unpack_masks(data, count)
+    return header, data
+
+
+def _unpack_header(raw_header: bytes, source) -> MazeHeader:
+    """
+    Decodes and checks the header of a maze.
+
+    :param raw_header: The header's bytes.
+    :param source: The file or data the header comes from, for error messages.
+    """
+    if len(raw_header) < HEADER.size:
+        raise ValueError(f'{source} is too short to be a maze file')
+    magic, version, cell_bits, _, width, height, start, goal, seed = HEADER.unpack(raw_header)
+    if magic != MAGIC:
+        raise ValueError(f'{source} is not a maze file')
+    if version != FORMAT_VERSION:
+        raise ValueError(f'Unsupported maze format version {version}')
+    if cell_bits not in (4, 8):
+        raise ValueError(f'Unsupported number of bits per cell {cell_bits}')
+    return MazeHeader(cell_bits, width, height, start, goal, None if seed == NO_SEED else seed)
+
+
+class MazeWriter:
+    """
+    Writes a maze to disk in the binary maze format, one line of cells at a time, without keeping them in memory.
+
+    A line holds the cells sharing the same x, so the width of the maze is the number of lines written. It is only
+    known once the writer is closed, which is when the header is completed.
+    """
+    def __init__(self, path, height: int, start: int = 0, goal: int | None = None, seed: int | None = None,
+                 cell_bits: int = 8) -> None:
+        """
+        Opens the file and reserves room for the header.
+
+        :param path: The path of the file to write.
+        :param height: The number of cells in a line.
+        :param start: The starting point's node ID.
+        :param goal: The goal's node ID. Default is the last cell written.
+        :param seed: The seed the maze was generated from, if any.
+        :param cell_bits: The number of bits stored per cell : 8 to allow memory-mapping the walls, 4 to save space.
+        """
+        if cell_bits not in (4, 8):
+            raise ValueError(f'Cells are stored on 4 or 8 bits, not {cell_bits}')
+        self.height = height
+        self.width = 0
+        self.start = start
+        self.goal = goal
+        self.seed = seed
+        self.cell_bits = cell_bits
+        # Mask waiting for the next line to share a byte with, when lines have an odd length
+        self._pending = None
+        self._file = open(path, "wb")
+        self._file.write(bytes(HEADER.size))
+
+    def write_line(self, masks: np.ndarray) -> None:
+        """
+        Appends a line of cells to the maze.
+
+        :param masks: The wall masks of the cells sharing the next x, from top to bottom.
+        """
+        masks = np.asarray(masks, dtype=np.uint8)
+        if len(masks) != self.height:
+            raise ValueError(f'Lines hold {self.height} cells, not {len(masks)}')
+        self.width += 1
+        if self.cell_bits == 8:
+            self._file.write(masks.tobytes())
+            return
+        if self._pending is not None:
+            masks = np.concatenate([[self._pending], masks])
+            self._pending = None
+        if len(masks) % 2:
+            self._pending = masks[-1]
+            masks = masks[:-1]
+        self._file.write(pack_masks(masks))
+
+    def close(self) -> None:
+        """
+        Writes the last cells and the header, then closes the file.
+        """
+        if self._file.closed:
+            return
+        if self._pending is not None:
+            self._file.write(pack_masks([self._pending, 0]))
+            self._pending = None
+        goal = self.goal if self.goal is not None else self.width * self.height - 1
+        self._file.seek(0)
+        self._file.write(_pack_header(MazeHeader(self.cell_bits, self.width, self.height, self.start, goal,
+                                                 self.seed)))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def save_eller_stream(path, width: int, height: int, seed: int | None = None, cell_bits: int = 8) -> None:
+    """
+    Generates a maze with Eller's algorithm and streams it to disk, using memory proportional to its height only.
+
+    :param path: The path of the file to write.
+    :param width: The width of the maze.
+    :param height: The height of the maze.
+    :param seed: The seed of the random generator. A random one is picked if None.
+    :param cell_bits: The number of bits stored per cell, 8 to allow memory-mapping the walls or 4 to save space.
+    """
+    if seed is None:
+        seed = int(np.random.default_rng().integers(2 ** 63))
+    rng = np.random.default_rng(seed)
+    with MazeWriter(path, height, seed=seed, cell_bits=cell_bits) as writer:
+        for line in eller_stream(height, rng, width):
+            writer.write_line(line)